@@ -0,0 +1,496 @@
+import copy
+import importlib.util
+import os
+import sys
+
+import pygame
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# bottom of a mid-sprint stack: one hole per row plus a full bottom row, so
+# every lock also clears a line
+FIXTURE = [".........."] * 12 + [
+    "#####.####",
+    "##.#######",
+    "#######.##",
+    ".#########",
+    "####.#####",
+    "########.#",
+    "###.######",
+    "##########",
+]
+FIXTURE_CELLS = [
+    (x, y) for y, row in enumerate(FIXTURE) for x, cell in enumerate(row) if cell == "#"
+]
+MARKUS_SEED = 0  # same piece queue in every sample
+
+
+def fixture_board(filled, empty):
+    return [[filled if cell == "#" else empty for cell in row] for row in FIXTURE]
+
+
+# imports <directory>/tetris.py under a unique module name. mistral-large and
+# o3-mini run their game loop at import time, so a QUIT event is queued first
+# and SystemExit is swallowed; everything defined before the loop survives
+def load(directory: str, name: str):
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+    pygame.event.post(pygame.event.Event(pygame.QUIT))
+
+    spec = importlib.util.spec_from_file_location(
+        name, os.path.join(ROOT, directory, "tetris.py")
+    )
+    module = importlib.util.module_from_spec(spec)
+    try:
+        spec.loader.exec_module(module)
+    except SystemExit:
+        pass
+    pygame.init()
+    pygame.event.clear()
+    return module
+
+
+# maps the benchmarked operations onto one implementation. reset() restores
+# the fixture board with a T piece at spawn; neither it nor the optional
+# prepare_<op>() hook is timed
+class Adapter:
+    name = ""
+
+    def reset(self):
+        raise NotImplementedError
+
+    def collision(self):
+        raise NotImplementedError
+
+    def move(self):
+        raise NotImplementedError
+
+    def rotate(self):
+        raise NotImplementedError
+
+    def ghost(self):
+        raise NotImplementedError
+
+    def hard_drop(self):
+        raise NotImplementedError
+
+    def lock(self):
+        raise NotImplementedError
+
+    def prepare_lock(self):
+        self.hard_drop()
+
+    def draw(self):
+        raise NotImplementedError
+
+
+class _FixturePiece:
+    # duck-types ActiveTetramino for Grid.insert_piece
+    def __init__(self, color):
+        self.color = color
+
+    def get_positions(self):
+        return FIXTURE_CELLS
+
+
+class Markus(Adapter):
+    name = "markus"
+    bitboard = False
+
+    def __init__(self):
+        sys.path.insert(0, os.path.join(ROOT, "markus"))
+        import render
+        from active_tetramino import ActiveTetramino
+        from bitboard_grid import BitboardGrid
+        from game import Game
+        from grid import Grid
+        from tetraminos import T
+
+        self.render = render
+        self.active_tetramino = ActiveTetramino
+        self.game_class = Game
+        self.grid_class = BitboardGrid if self.bitboard else Grid
+        self.piece = T
+        self.window = pygame.display.set_mode((render.S_WIDTH, render.S_HEIGHT))
+        self.reset()
+
+    # a whole new game per sample, so lines, queue, hold and the ghost cache
+    # never carry over from the previous one
+    def reset(self):
+        grid = self.grid_class()
+        grid.insert_piece(_FixturePiece(self.piece.color))
+        self.game = self.game_class(grid, MARKUS_SEED)
+        self.game.active_tetramino = self.active_tetramino(self.piece, grid)
+
+    def collision(self):
+        self.game.grid.fits(self.game.active_tetramino)
+
+    def move(self):
+        self.game.active_tetramino.move_left()
+
+    def rotate(self):
+        self.game.active_tetramino.rotate_cw()
+
+    def ghost(self):
+        self.game.active_tetramino.ghost()
+
+    def hard_drop(self):
+        self.game.soft_drop()
+
+    def lock(self):
+        self.game.lock()
+
+    def draw(self):
+        self.render.draw(self.window, self.game.snapshot())
+
+
+class MarkusBitboard(Markus):
+    name = "markus-bitboard"
+    bitboard = True
+
+
+class Claude(Adapter):
+    name = "claude-3-7"
+
+    def __init__(self):
+        self.module = load("claude-3-7", "tetris_claude_3_7")
+        self.game = self.module.Tetris()
+        self.board = fixture_board("T", None)
+
+    def reset(self):
+        game = self.game
+        game.board = copy.deepcopy(self.board)
+        game.state = self.module.GameState.PLAYING
+        game.current_piece = "T"
+        game.current_rotation = 0
+        game.current_piece_pos = (3, 0)
+        game.lines_cleared = 0
+
+    def collision(self):
+        self.game.check_collision()
+
+    def move(self):
+        self.game.move(-1, 0)
+
+    def rotate(self):
+        self.game.rotate(1)
+
+    def ghost(self):
+        self.game.get_ghost_position()
+
+    def hard_drop(self):
+        while self.game.move(0, 1):
+            pass
+
+    def lock(self):
+        self.game.lock_piece()
+
+    def draw(self):
+        self.game.draw_board()
+
+
+class Cursor(Adapter):
+    name = "cursor"
+
+    def __init__(self):
+        self.module = load("cursor", "tetris_cursor")
+        self.game = self.module.Tetris()
+        self.board = fixture_board("T", None)
+
+    def reset(self):
+        game = self.game
+        game.grid = copy.deepcopy(self.board)
+        game.current_piece = "T"
+        game.current_rotation = self.module.Rotation.ZERO
+        game.current_pos = (3, 0)
+        game.lines_cleared = 0
+
+    def collision(self):
+        self.game.check_collision()
+
+    def move(self):
+        self.game.move_piece(-1, 0)
+
+    def rotate(self):
+        self.game.rotate_piece(clockwise=True)
+
+    def ghost(self):
+        self.game.get_ghost_position()
+
+    def hard_drop(self):
+        while self.game.move_piece(0, 1):
+            pass
+
+    def lock(self):
+        self.game.lock_piece()
+
+    def draw(self):
+        self.game.draw_grid()
+        pygame.display.flip()
+
+
+class DeepSeek(Adapter):
+    name = "DeepSeek-R1"
+
+    def __init__(self):
+        self.module = load("DeepSeek-R1", "tetris_deepseek_r1")
+        self.game = self.module.TetrisGame()
+        self.board = fixture_board(3, 0)
+
+    def reset(self):
+        game = self.game
+        game.board = copy.deepcopy(self.board)
+        game.current_piece = {
+            "type": "T",
+            "shape": self.module.TETRIMINOS["T"]["shape"],
+            "color": self.module.TETRIMINOS["T"]["color"],
+            "x": self.module.BOARD_WIDTH // 2 - 2,
+            "y": 0,
+            "rotation": 0,
+        }
+        game.ghost_piece = game._get_ghost_position()
+        game.lines = 0
+        game.game_over = False
+
+    def collision(self):
+        self.game._check_collision()
+
+    def move(self):
+        self.game._move(-1)
+
+    def rotate(self):
+        self.game._rotate(1)
+
+    def ghost(self):
+        self.game._get_ghost_position()
+
+    def hard_drop(self):
+        # _hard_drop without the _lock_piece call
+        game = self.game
+        while not game._check_collision():
+            game.current_piece["y"] += 1
+        game.current_piece["y"] -= 1
+
+    def lock(self):
+        self.game._lock_piece()
+
+    def draw(self):
+        self.game._draw()
+
+
+class Llama(Adapter):
+    name = "Llama-3.3-70B-Instruct"
+
+    def __init__(self):
+        self.module = load("Llama-3.3-70B-Instruct", "tetris_llama_3_3")
+        self.game = self.module.Tetris()
+        self.board = fixture_board(1, 0)
+
+    def reset(self):
+        game = self.game
+        game.grid = copy.deepcopy(self.board)
+        game.piece = "T"
+        game.piece_x, game.piece_y = self.module.GRID_WIDTH // 2, 0
+        game.piece_rotation = 0
+        game.lines = 0
+
+    def collision(self):
+        self.game.check_collision()
+
+    def move(self):
+        self.game.move_piece(-1)
+
+    def rotate(self):
+        self.game.rotate_piece(1)
+
+    def ghost(self):
+        # the search loop from draw_ghost_piece, without the rects
+        game = self.game
+        shape = self.module.ROTATIONS[game.piece][game.piece_rotation]
+        ghost_y = game.piece_y
+        while ghost_y + len(shape) < self.module.GRID_HEIGHT and not (
+            game.check_collision_ghost(ghost_y + 1)
+        ):
+            ghost_y += 1
+
+    def hard_drop(self):
+        # hard_drop without the lock_piece call
+        game = self.game
+        while not game.check_collision():
+            game.piece_y += 1
+        game.piece_y -= 1
+
+    def lock(self):
+        self.game.lock_piece()
+
+    def draw(self):
+        self.game.draw()
+
+
+class Gemini(Adapter):
+    name = "gemini-2.0"
+
+    def __init__(self):
+        self.module = load("gemini-2.0", "tetris_gemini_2_0")
+        self.screen = pygame.display.set_mode((self.module.WIDTH, self.module.HEIGHT))
+        self.board = fixture_board(7, 0)
+        self.next_pieces = [1, 2, 3, 4, 5]
+
+    def reset(self):
+        self.grid = copy.deepcopy(self.board)
+        self.piece = self.module.init_piece(7)
+
+    def collision(self):
+        self.module.check_collision(self.grid, self.piece)
+
+    def move(self):
+        # the inline horizontal move from the game loop
+        new_piece = {**self.piece, "x": self.piece["x"] - 1}
+        if not self.module.check_collision(self.grid, new_piece):
+            self.piece = new_piece
+
+    def rotate(self):
+        new_piece = {**self.piece, "rotation": (self.piece["rotation"] + 1) % 4}
+        kicked_piece = self.module.kick(self.grid, self.piece, new_piece)
+        if kicked_piece:
+            self.piece = kicked_piece
+
+    def ghost(self):
+        self.module.hard_drop(self.grid, {**self.piece})
+
+    def hard_drop(self):
+        self.piece, _ = self.module.hard_drop(self.grid, self.piece)
+
+    def lock(self):
+        self.module.place_piece(self.grid, self.piece)
+        self.grid, _ = self.module.clear_lines(self.grid)
+
+    def draw(self):
+        # the drawing half of the game loop
+        module = self.module
+        self.screen.fill((0, 0, 0))
+        module.draw_grid(self.screen, self.grid)
+        ghost_piece = {**self.piece, "y": int(self.piece["y"])}
+        module.draw_ghost_piece(self.screen, self.grid, ghost_piece)
+        module.draw_piece(self.screen, self.piece)
+        module.draw_hold(self.screen, None)
+        module.draw_next_pieces(self.screen, self.next_pieces)
+        lines_text = module.font.render("Lines: 0", True, (255, 255, 255))
+        self.screen.blit(lines_text, (module.GRID_WIDTH * module.CELL_SIZE + 20, 250))
+        pygame.display.flip()
+
+
+class Mistral(Adapter):
+    name = "mistral-large"
+
+    def __init__(self):
+        module = load("mistral-large", "tetris_mistral_large")
+        module.screen = pygame.display.set_mode(
+            (module.SCREEN_WIDTH + 150, module.SCREEN_HEIGHT)
+        )
+        self.module = module
+        self.board = fixture_board(6, 0)
+
+    def reset(self):
+        module = self.module
+        module.grid[:] = copy.deepcopy(self.board)
+        module.current_piece = {
+            "shape": module.SHAPES[5],
+            "color": 6,
+            "x": module.GRID_WIDTH // 2 - 2,
+            "y": 0,
+        }
+
+    def collision(self):
+        piece = self.module.current_piece
+        self.module.check_collision(piece["shape"], (piece["x"], piece["y"]))
+
+    def move(self):
+        self.module.move_piece(-1, 0)
+
+    def rotate(self):
+        self.module.rotate_current_piece()
+
+    def ghost(self):
+        # the search loop from draw_ghost_piece, without the rects
+        ghost_piece = self.module.current_piece.copy()
+        while not self.module.check_collision(
+            ghost_piece["shape"], (ghost_piece["x"], ghost_piece["y"] + 1)
+        ):
+            ghost_piece["y"] += 1
+
+    def hard_drop(self):
+        while self.module.move_piece(0, 1):
+            pass
+
+    def lock(self):
+        self.module.join_piece()
+
+    def draw(self):
+        # the drawing half of the game loop
+        module = self.module
+        module.screen.fill((0, 0, 0))
+        module.draw_grid()
+        module.draw_piece(module.current_piece)
+        module.draw_ghost_piece()
+        module.draw_next_pieces()
+        module.draw_held_piece()
+        pygame.display.flip()
+
+
+class O3Mini(Adapter):
+    name = "o3-mini"
+
+    def __init__(self):
+        module = load("o3-mini", "tetris_o3_mini")
+        module.screen = pygame.display.set_mode((module.WIDTH, module.HEIGHT))
+        module.FONT = pygame.font.SysFont("Arial", 20)
+        self.module = module
+        self.game = module.TetrisGame()
+        # o3-mini keeps two hidden rows above the visible 20
+        hidden = [[None] * module.COLS for _ in range(2)]
+        self.board = hidden + fixture_board("T", None)
+
+    def reset(self):
+        game = self.game
+        game.board = copy.deepcopy(self.board)
+        game.current = self.module.Piece("T")
+        game.total_cleared = 0
+        game.finish_time = None
+
+    def collision(self):
+        self.module.valid_position(self.game.current.get_blocks(), self.game.board)
+
+    def move(self):
+        self.game.move(-1, 0)
+
+    def rotate(self):
+        self.game.current.rotate("CW", self.game.board)
+
+    def ghost(self):
+        self.module.get_ghost(self.game.current, self.game.board)
+
+    def hard_drop(self):
+        # hard_drop without the lock_piece call
+        self.game.current.y = self.module.get_ghost(
+            self.game.current, self.game.board
+        ).y
+
+    def lock(self):
+        self.game.lock_piece()
+
+    def draw(self):
+        self.game.draw()
+
+
+ADAPTERS = [
+    Markus,
+    MarkusBitboard,
+    Claude,
+    Cursor,
+    O3Mini,
+    Gemini,
+    DeepSeek,
+    Mistral,
+    Llama,
+]
@@ -0,0 +1,109 @@
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+from run import percentile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "markus"))
+
+from active_tetramino import ActiveTetramino  # noqa: E402
+from bitboard_grid import BitboardGrid  # noqa: E402
+from grid import Grid  # noqa: E402
+from placements import placements  # noqa: E402
+from tetraminos import I, J, L, O, S, T, Z  # noqa: E402
+
+GRIDS = {"list": Grid, "bitboard": BitboardGrid}
+
+
+class _Cells:
+    # duck-types ActiveTetramino for Grid.insert_piece
+    def __init__(self, cells):
+        self.color = T.color
+        self.cells = cells
+
+    def get_positions(self):
+        return self.cells
+
+
+# a stack up to half the board high with gaps in it, but no full rows
+def cluttered_board(grid_class) -> Grid:
+    cells = []
+    for x in range(Grid.WIDTH):
+        height = random.randint(0, Grid.HEIGHT // 2)
+        for y in range(Grid.HEIGHT - height, Grid.HEIGHT):
+            if random.random() < 0.8:
+                cells.append((x, y))
+    for y in range(Grid.HEIGHT):
+        row = [cell for cell in cells if cell[1] == y]
+        if len(row) == Grid.WIDTH:
+            cells.remove(random.choice(row))
+    grid = grid_class()
+    grid.insert_piece(_Cells(cells))
+    return grid
+
+
+# times placements() for a spawned piece on random cluttered boards; every
+# board is searched once per round and keeps its fastest round
+def time_placements(grid_class, boards: int, rounds: int) -> dict:
+    pieces = []
+    for _ in range(boards):
+        grid = cluttered_board(grid_class)
+        pieces.append(ActiveTetramino(random.choice((I, J, L, O, S, T, Z)), grid))
+    clock = time.perf_counter_ns
+    best = [None] * boards
+    for _ in range(rounds):
+        for i, piece in enumerate(pieces):
+            start = clock()
+            placements(piece.grid, piece)
+            elapsed = clock() - start
+            if best[i] is None or elapsed < best[i]:
+                best[i] = elapsed
+
+    best.sort()
+    return {
+        "boards": boards,
+        "rounds": rounds,
+        "mean_us": sum(best) / boards / 1000,
+        "p50_us": percentile(best, 0.50) / 1000,
+        "p99_us": percentile(best, 0.99) / 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Time markus' reachable-placement search on cluttered boards."
+    )
+    parser.add_argument("grids", nargs="*", help="any of: " + ", ".join(GRIDS))
+    parser.add_argument("-n", "--boards", type=int, default=200)
+    parser.add_argument("-r", "--rounds", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", help="write JSON here instead of stdout")
+    args = parser.parse_args()
+    unknown = set(args.grids) - set(GRIDS)
+    if unknown:
+        parser.error("unknown grid(s): " + ", ".join(sorted(unknown)))
+
+    results = {}
+    for name in args.grids or GRIDS:
+        random.seed(args.seed)
+        results[name] = time_placements(GRIDS[name], args.boards, args.rounds)
+
+    report = {
+        "meta": {"python": platform.python_version(), "seed": args.seed},
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
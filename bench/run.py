@@ -0,0 +1,107 @@
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame  # noqa: E402
+from adapters import ADAPTERS  # noqa: E402
+
+OPS = ["collision", "move", "rotate", "ghost", "hard_drop", "lock", "draw"]
+
+
+def percentile(sorted_samples: list[int], fraction: float) -> int:
+    index = min(len(sorted_samples) - 1, int(len(sorted_samples) * fraction))
+    return sorted_samples[index]
+
+
+def time_op(adapter, op: str, iterations: int) -> dict:
+    run = getattr(adapter, op)
+    prepare = getattr(adapter, "prepare_" + op, None)
+    clock = time.perf_counter_ns
+    samples = []
+    for _ in range(iterations):
+        adapter.reset()
+        if prepare is not None:
+            prepare()
+        start = clock()
+        run()
+        samples.append(clock() - start)
+
+    samples.sort()
+    total = sum(samples)
+    return {
+        "iterations": iterations,
+        "ops_per_sec": iterations * 1e9 / total if total else None,
+        "p50_us": percentile(samples, 0.50) / 1000,
+        "p99_us": percentile(samples, 0.99) / 1000,
+    }
+
+
+def main():
+    names = [adapter.name for adapter in ADAPTERS]
+    parser = argparse.ArgumentParser(
+        description="Time the engine hot paths of every Tetris implementation."
+    )
+    parser.add_argument(
+        "implementations", nargs="*", help="any of: " + ", ".join(names)
+    )
+    parser.add_argument("-n", "--iterations", type=int, default=2000)
+    parser.add_argument(
+        "--draw-iterations",
+        type=int,
+        default=200,
+        help="iterations for the full-frame draw, which is much slower",
+    )
+    parser.add_argument("--ops", nargs="+", choices=OPS, default=OPS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", help="write JSON here instead of stdout")
+    args = parser.parse_args()
+    unknown = set(args.implementations) - set(names)
+    if unknown:
+        parser.error("unknown implementation(s): " + ", ".join(sorted(unknown)))
+
+    selected = [
+        adapter
+        for adapter in ADAPTERS
+        if not args.implementations or adapter.name in args.implementations
+    ]
+    results = {}
+    for adapter_class in selected:
+        random.seed(args.seed)
+        adapter = adapter_class()
+        results[adapter_class.name] = {
+            op: time_op(
+                adapter,
+                op,
+                args.draw_iterations if op == "draw" else args.iterations,
+            )
+            for op in args.ops
+        }
+        print(adapter_class.name, "done", file=sys.stderr)
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "video_driver": os.environ["SDL_VIDEODRIVER"],
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,14 @@
+# What a key press asks the game to do. The simulation, replays and bots
+# only deal in these codes; which key does what is up to the front end.
+# The values double as the key indices of the replay format.
+MOVE_LEFT = 0
+MOVE_RIGHT = 1
+SOFT_DROP = 2
+ROTATE_CW = 3
+ROTATE_CCW = 4
+ROTATE_180 = 5
+HARD_DROP = 6
+HOLD = 7
+RESTART = 8
+ACTION_COUNT = 9
+OTHER = 127  # any other key, it still starts the timer
@@ -1,91 +1,116 @@
 from copy import copy
-import pygame
 from grid import Grid
 from tetraminos import Tetramino
 
 
 class ActiveTetramino(Tetramino):
-    def __init__(self, tetramino: Tetramino, x=4, y=2):
+    def __init__(self, tetramino: Tetramino, grid: Grid, x=4, y=2):
+        self.grid = grid
+        self.reset(tetramino, x, y)
+
+    # turns this object into a freshly spawned tetramino
+    def reset(self, tetramino: Tetramino, x=4, y=2):
         self.x = x
         self.y = y
         self.rotation = 0
         self.base_tetramino = tetramino
-        super().__init__(tetramino.color, tetramino.shapes, tetramino.rotation_offsets)
+        # share the compiled tables instead of re-running Tetramino.__init__
+        self.color = tetramino.color
+        self.shapes = tetramino.shapes
+        self.rotation_offsets = tetramino.rotation_offsets
+        self.table = tetramino.table
+        self._ghost = None
 
     def move_left(self) -> bool:
         self.x -= 1
-        if not Grid.get().fits(self):
+        if not self.grid.fits(self):
             self.x += 1
             return False
         return True
 
     def move_right(self) -> bool:
         self.x += 1
-        if not Grid.get().fits(self):
+        if not self.grid.fits(self):
             self.x -= 1
             return False
         return True
 
+    # moves as far left or right as the board allows in one step
+    def slide_left(self) -> bool:
+        distance = self.grid.slide_distance(self, -1)
+        self.x -= distance
+        return distance > 0
+
+    def slide_right(self) -> bool:
+        distance = self.grid.slide_distance(self, 1)
+        self.x += distance
+        return distance > 0
+
     def move_down(self) -> bool:
         self.y += 1
-        if not Grid.get().fits(self):
+        if not self.grid.fits(self):
             self.y -= 1
             return False
         return True
 
+    # falls straight onto the stack, returns the rows fallen
+    def drop(self) -> int:
+        landing = self.ghost_y()
+        distance = landing - self.y
+        self.y = landing
+        return distance
+
     def rotate_cw(self) -> bool:
         self.rotation = (self.rotation + 1) % 4
-        if not Grid.get().fits(self):
+        if not self.grid.fits(self):
             self.rotation = (self.rotation + 3) % 4
             return False
         return True
 
     def rotate_ccw(self) -> bool:
         self.rotation = (self.rotation + 3) % 4
-        if not Grid.get().fits(self):
+        if not self.grid.fits(self):
             self.rotation = (self.rotation + 1) % 4
             return False
         return True
 
     def rotate_180(self) -> bool:
         self.rotation = (self.rotation + 2) % 4
-        if not Grid.get().fits(self):
+        if not self.grid.fits(self):
             self.rotation = (self.rotation + 2) % 4
             return False
         return True
 
     def get_positions(self) -> list[tuple[int, int]]:
-        positions = []
-        shape = self.shapes[self.rotation]
-
-        for i, line in enumerate(shape):
-            row = list(line)
-            for j, column in enumerate(row):
-                if column == "0":
-                    positions.append((self.x + j, self.y + i))
-
-        for i, pos in enumerate(positions):
-            positions[i] = (pos[0] - 2, pos[1] - 4)
-
-        return positions
-
-    def draw(self, surface: pygame.Surface, tile_size: int):
-        for x, y in self.get_positions():
-            pygame.draw.rect(
-                surface,
-                self.color,
-                (
-                    x * tile_size,
-                    y * tile_size,
-                    tile_size,
-                    tile_size,
-                ),
-                0,
-            )
-
-    def draw_ghost(self, surface: pygame.Surface, tile_size: int):
+        x = self.x
+        y = self.y
+        return [(x + dx, y + dy) for dx, dy in self.table[self.rotation].cells]
+
+    # Row the piece would land on. The drop is cached against the board
+    # version, the rotation's table and the column, and stays valid from
+    # every row between where it was measured and where it lands, so gravity
+    # and soft drops reuse it too.
+    def ghost_y(self) -> int:
+        table = self.table[self.rotation]
+        ghost = self._ghost
+        if (
+            ghost is not None
+            and ghost[0] == self.grid.version
+            and ghost[1] is table
+            and ghost[2] == self.x
+            and ghost[3] <= self.y <= ghost[4]
+        ):
+            return ghost[4]
+        landing = self.y + self.grid.drop_distance(self)
+        self._ghost = (self.grid.version, table, self.x, self.y, landing)
+        return landing
+
+    def ghost_positions(self) -> list[tuple[int, int]]:
+        x = self.x
+        y = self.ghost_y()
+        return [(x + dx, y + dy) for dx, dy in self.table[self.rotation].cells]
+
+    def ghost(self) -> "ActiveTetramino":
         ghost = copy(self)
-        ghost.color = (self.color[0] // 2, self.color[1] // 2, self.color[2] // 2)
-        while ghost.move_down():
-            pass
-        ghost.draw(surface, tile_size)
+        ghost.y = self.ghost_y()
+        return ghost
@@ -0,0 +1,98 @@
+from grid import FULL_ROW, PALETTE, PALETTE_INDEX, Grid
+
+RIGHT_WALL = 1 << Grid.WIDTH
+EMPTY_COLORS = bytes(Grid.WIDTH)
+
+
+# rows[y] has bit x set when cell (x, y) is filled, colors[y][x] is an index
+# into PALETTE and is only read when drawing
+class BitboardGrid(Grid):
+    def __init__(self):
+        self.rows = [0] * Grid.HEIGHT
+        self.colors = [bytearray(Grid.WIDTH) for _ in range(Grid.HEIGHT)]
+        self._init_profile()
+
+    def reset(self):
+        rows = self.rows
+        for y in range(Grid.HEIGHT):
+            rows[y] = 0
+        for colors in self.colors:
+            colors[:] = EMPTY_COLORS
+        self._reset_profile()
+
+    def insert_piece(self, active_tetramino):
+        color = PALETTE_INDEX[active_tetramino.color]
+        positions = active_tetramino.get_positions()
+        self._insert_profile(positions)
+        for x, y in positions:
+            self.rows[y] |= 1 << x
+            self.colors[y][x] = color
+
+    def fits(self, active_tetramino):
+        table = active_tetramino.table[active_tetramino.rotation]
+        x = active_tetramino.x
+        y = active_tetramino.y
+        if (
+            x + table.min_x < 0
+            or x + table.max_x >= Grid.WIDTH
+            or y + table.max_y >= Grid.HEIGHT
+        ):
+            return False
+
+        shift = x + table.min_x
+        rows = self.rows
+        for dy, mask in table.row_masks:
+            if y + dy >= 0 and rows[y + dy] & mask << shift:
+                return False
+        return True
+
+    # Every row of a piece is one run of cells, so it can slide until its
+    # leading cell meets the nearest filled cell or wall in that row; the
+    # cells behind only cross columns the leading cell already crossed.
+    def slide_distance(self, active_tetramino, direction: int) -> int:
+        table = active_tetramino.table[active_tetramino.rotation]
+        shift = active_tetramino.x + table.min_x
+        y = active_tetramino.y
+        rows = self.rows
+        distance = Grid.WIDTH
+        for dy, mask in table.row_masks:
+            row = rows[y + dy] if y + dy >= 0 else 0
+            if row & mask << shift:
+                # spawned into the stack on a top-out
+                return self._step_distance(active_tetramino, direction, 0)
+            if direction < 0:
+                lead = (mask & -mask).bit_length() - 1 + shift
+                # the left wall is column -1
+                free = lead - (row & (1 << lead) - 1).bit_length()
+            else:
+                lead = mask.bit_length() - 1 + shift
+                blocked = (row | RIGHT_WALL) >> lead + 1
+                free = (blocked & -blocked).bit_length() - 1
+            if free < distance:
+                distance = free
+        return distance
+
+    def clear_rows(self) -> int:
+        cleared = []
+        for i, row in enumerate(self.rows):
+            if row == FULL_ROW:
+                cleared.append(i)
+                del self.rows[i]
+                del self.colors[i]
+                self.rows.insert(0, 0)
+                self.colors.insert(0, bytearray(Grid.WIDTH))
+        self._clear_profile(cleared)
+        return len(cleared)
+
+    def color(self, x: int, y: int) -> tuple[int, int, int]:
+        return PALETTE[self.colors[y][x]]
+
+    # the live rows, not a copy
+    def row_bits(self) -> list[int]:
+        return self.rows
+
+    def filled(self, x: int, y: int) -> bool:
+        return self.rows[y] >> x & 1 == 1
+
+    def color_indices(self) -> bytes:
+        return b"".join(self.colors)
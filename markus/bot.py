@@ -0,0 +1,228 @@
+import os
+from dataclasses import dataclass
+from time import perf_counter
+from typing import Generator, Optional
+
+from actions import HOLD
+from grid import FULL_ROW, Grid
+from piece_queue import VISIBLE_QUEUE_LENGTH
+from placements import Placement, placements, search
+from profiler import phase
+from simulation import Simulation
+from tetraminos import Tetramino
+
+# TETRIS_BOT=pps lets the bot play, placing at most pps pieces a second;
+# unset or empty leaves it off
+BOT_PPS = float(os.environ.get("TETRIS_BOT") or 0)
+
+BEAM_WIDTH = 4
+SLICE_MS = 4  # thinking per main loop iteration, the frame gets the rest
+
+# the usual four-feature board weights, tuned for surviving and clearing
+HEIGHT_WEIGHT = -0.510066
+LINES_WEIGHT = 0.760666
+HOLES_WEIGHT = -0.35663
+BUMPINESS_WEIGHT = -0.184483
+
+THINK_PHASE = phase("bot")
+
+
+# One board the search reached: which pieces are used up and what the first
+# move on the way here was.
+@dataclass
+class Node:
+    rows: list[int]
+    tops: list[int]
+    held: Optional[Tetramino]
+    next_piece: int  # index into the known sequence
+    lines: int
+    score: float
+    hold: bool = False  # the first move starts with a hold
+    first: Optional[Placement] = None
+
+
+# Board score and the first filled row of every column, in one pass from
+# the top over the row bits.
+def evaluate(rows: list[int]) -> tuple[float, list[int]]:
+    tops = [Grid.HEIGHT] * Grid.WIDTH
+    seen = 0  # columns with a filled cell above the current row
+    holes = 0
+    for y, row in enumerate(rows):
+        if not seen and not row:
+            continue
+        holes += (seen & ~row).bit_count()
+        new = row & ~seen
+        while new:
+            bit = new & -new
+            tops[bit.bit_length() - 1] = y
+            new ^= bit
+        seen |= row
+    height = Grid.HEIGHT * Grid.WIDTH - sum(tops)
+    bumpiness = 0
+    for x in range(Grid.WIDTH - 1):
+        bumpiness += abs(tops[x] - tops[x + 1])
+    score = HEIGHT_WEIGHT * height + HOLES_WEIGHT * holes + BUMPINESS_WEIGHT * bumpiness
+    return score, tops
+
+
+# the rows after locking placement and clearing, and the lines cleared
+def place(rows: list[int], placement: Placement) -> tuple[list[int], int]:
+    rows = rows.copy()
+    for x, y in placement.positions():
+        rows[y] |= 1 << x
+    kept = [row for row in rows if row != FULL_ROW]
+    lines = Grid.HEIGHT - len(kept)
+    if lines:
+        rows = [0] * lines + kept
+    return rows, lines
+
+
+# Beam search over the active piece, the preview and the held piece: every
+# node is expanded with every placement of the piece it places next, with
+# and without a hold, and the BEAM_WIDTH best boards go on to the next
+# piece. Yields after every search and every board it scores, so it can be
+# spread over frames, and returns the best leaf.
+def beam_search(
+    root: Node, pieces: list[Tetramino], placed: list[Placement], hold_available: bool
+) -> Generator[None, None, Optional[Node]]:
+    beam = [root]
+    best = None
+    while beam:
+        children = []
+        for node in beam:
+            for hold in (False, True):
+                if node.next_piece >= len(pieces):
+                    break
+                held = node.held
+                index = node.next_piece
+                if not hold:
+                    piece = pieces[index]
+                    index += 1
+                elif not hold_available and node is root:
+                    continue
+                elif held is None:
+                    if index + 1 >= len(pieces):
+                        continue
+                    held = pieces[index]
+                    piece = pieces[index + 1]
+                    index += 2
+                else:
+                    held, piece = pieces[index], held
+                    index += 1
+
+                if node is root and not hold:
+                    options = placed
+                else:
+                    options = search(node.rows, node.tops, piece)
+                    yield
+                for placement in options:
+                    if placement.y + piece.table[placement.rotation].min_y < 0:
+                        continue  # locks out above the board
+                    rows, lines = place(node.rows, placement)
+                    score, tops = evaluate(rows)
+                    lines += node.lines
+                    children.append(
+                        Node(
+                            rows,
+                            tops,
+                            held,
+                            index,
+                            lines,
+                            score + LINES_WEIGHT * lines,
+                            node.hold if node is not root else hold,
+                            node.first if node is not root else placement,
+                        )
+                    )
+                    yield
+        children.sort(key=lambda child: child.score, reverse=True)
+        beam = children[:BEAM_WIDTH]
+        if beam:
+            best = beam[0]
+    return best
+
+
+# Plays the sprint through a Simulation the way a player would, by pushing
+# key taps. The search for the next piece runs in slices of SLICE_MS between
+# frames, and the taps for a piece go in at once, at most pps pieces a
+# second.
+class Bot:
+    def __init__(self, sim: Simulation, pps: float = BOT_PPS):
+        self.sim = sim
+        self.interval = 1000 / pps
+        self.next_at = 0.0
+        self._search = None
+        self._best: Optional[Node] = None
+        self._position = None
+
+    # when the main loop should call update() next
+    def next_deadline(self, now: float) -> float:
+        if self._search is not None:
+            return now
+        return max(now, self.next_at)
+
+    # thinks for up to budget_ms of wall-clock time
+    def update(self, now: float, budget_ms: float = SLICE_MS):
+        sim = self.sim
+        game = sim.game
+        if sim.inputs or game.finished:
+            return
+        position = (game.seed, game.queue.position, game.hold_available)
+        if position != self._position:
+            self._position = position
+            self._start()
+        if self._search is not None:
+            with THINK_PHASE:
+                self._think(perf_counter() * 1000 + budget_ms)
+        if self._search is None and now >= self.next_at:
+            self._play(now)
+
+    def _start(self):
+        game = self.sim.game
+        pieces = [game.active_tetramino.base_tetramino]
+        pieces += game.queue.preview(VISIBLE_QUEUE_LENGTH)
+        rows = game.grid.row_bits().copy()
+        tops = [Grid.HEIGHT - height for height in game.grid.heights]
+        root = Node(rows, tops, game.held_tetramino, 0, 0, 0.0)
+        placed = placements(game.grid, game.active_tetramino)
+        self._search = beam_search(root, pieces, placed, game.hold_available)
+        self._best = None
+
+    def _think(self, until: float):
+        try:
+            while perf_counter() * 1000 < until:
+                next(self._search)
+        except StopIteration as done:
+            self._search = None
+            self._best = done.value
+
+    def _play(self, now: float):
+        best = self._best
+        self._best = None
+        self._position = None  # plan again once the taps are in
+        self.next_at = now + self.interval
+        if best is None or best.first is None:
+            return
+        target = best.first
+        taps = []
+        game = self.sim.game
+        if best.hold:
+            taps.append(HOLD)
+            tops = [Grid.HEIGHT - height for height in game.grid.heights]
+            options = search(game.grid.row_bits(), tops, target.piece)
+        else:
+            # the path again from where the piece is now, gravity may have
+            # moved it while the search ran
+            options = placements(game.grid, game.active_tetramino)
+        for placement in options:
+            if (placement.x, placement.y, placement.rotation) == (
+                target.x,
+                target.y,
+                target.rotation,
+            ):
+                taps += placement.path
+                break
+        else:
+            return
+        for tap in taps:
+            self.sim.push(now, tap, True)
+            self.sim.push(now, tap, False)
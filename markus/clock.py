@@ -0,0 +1,56 @@
+from time import perf_counter
+
+
+# Game time in ms. Everything that schedules or stamps game events reads
+# the time through one of these, so the same engine can run against the
+# wall clock, a scripted timeline or the wall clock sped up.
+class Clock:
+    def now(self) -> float:
+        raise NotImplementedError
+
+    # called once per main loop iteration
+    def tick(self):
+        pass
+
+    # wall-clock ms to wait for ms of game time to pass
+    def real_ms(self, ms: float) -> float:
+        return ms
+
+
+class RealClock(Clock):
+    def now(self) -> float:
+        return perf_counter() * 1000
+
+
+# The wall clock running speed times as fast, from the moment it is made.
+class WarpClock(Clock):
+    def __init__(self, speed: float):
+        self.speed = speed
+        self.origin = perf_counter() * 1000
+
+    def now(self) -> float:
+        return self.origin + (perf_counter() * 1000 - self.origin) * self.speed
+
+    def real_ms(self, ms: float) -> float:
+        return ms / self.speed
+
+
+# Time that only moves when told to: step_ms per main loop iteration, or
+# straight to a given time with advance_to(). Nothing ever waits on it, so
+# runs are bit-identical however fast the machine is.
+class FixedStepClock(Clock):
+    def __init__(self, step_ms: float = 0.0, start: float = 0.0):
+        self.step_ms = step_ms
+        self.time = start
+
+    def now(self) -> float:
+        return self.time
+
+    def tick(self):
+        self.time += self.step_ms
+
+    def advance_to(self, time: float):
+        self.time = max(self.time, time)
+
+    def real_ms(self, ms: float) -> float:
+        return 0.0
@@ -0,0 +1,96 @@
+import random
+from dataclasses import dataclass
+from typing import Optional
+
+from active_tetramino import ActiveTetramino
+from grid import Grid
+from piece_queue import Queue
+from profiler import phase
+from tetraminos import Tetramino
+
+SPRINT_LINES = 40
+
+LOCK_PHASE = phase("lock")
+CLEAR_PHASE = phase("clear_rows")
+
+
+# Everything the renderer needs from one simulation tick. It owns copies of
+# the board and piece cells, so it stays valid while the game moves on.
+@dataclass(frozen=True)
+class Snapshot:
+    cells: bytes  # PALETTE index of every locked cell, row-major
+    piece: Tetramino
+    positions: tuple[tuple[int, int], ...]
+    ghost_positions: tuple[tuple[int, int], ...]
+    queue: tuple[Tetramino, ...]
+    held: Optional[Tetramino]
+    lines_left: int
+
+
+def new_seed() -> int:
+    return random.getrandbits(32)
+
+
+class Game:
+    def __init__(self, grid: Optional[Grid] = None, seed: Optional[int] = None):
+        self.grid = grid if grid is not None else Grid.create()
+        self.seed = seed if seed is not None else new_seed()
+        self.queue = Queue(self.seed)
+        self.active_tetramino = ActiveTetramino(self.queue.pop(), self.grid)
+        self.held_tetramino: Optional[Tetramino] = None
+        self.hold_available = True
+        self.lines_left = SPRINT_LINES
+
+    # back to the start of a new sprint, reusing the grid, queue and piece
+    def reset(self, seed: Optional[int] = None):
+        self.seed = seed if seed is not None else new_seed()
+        self.grid.reset()
+        self.queue.reset(self.seed)
+        self.active_tetramino.reset(self.queue.pop())
+        self.held_tetramino = None
+        self.hold_available = True
+        self.lines_left = SPRINT_LINES
+
+    @property
+    def finished(self) -> bool:
+        return self.lines_left < 1
+
+    def snapshot(self) -> Snapshot:
+        piece = self.active_tetramino
+        return Snapshot(
+            cells=self.grid.color_indices(),
+            piece=piece.base_tetramino,
+            positions=tuple(piece.get_positions()),
+            ghost_positions=tuple(piece.ghost_positions()),
+            queue=tuple(self.queue.preview()),
+            held=self.held_tetramino,
+            lines_left=self.lines_left,
+        )
+
+    def soft_drop(self):
+        self.active_tetramino.drop()
+
+    def hard_drop(self) -> int:
+        self.soft_drop()
+        return self.lock()
+
+    def lock(self) -> int:
+        with LOCK_PHASE:
+            self.grid.insert_piece(self.active_tetramino)
+            with CLEAR_PHASE:
+                lines_cleared = self.grid.clear_rows()
+            self.lines_left -= lines_cleared
+            self.active_tetramino.reset(self.queue.pop())
+            self.hold_available = True
+        return lines_cleared
+
+    def hold(self) -> bool:
+        if not self.hold_available:
+            return False
+        held_tetramino = self.held_tetramino
+        self.held_tetramino = self.active_tetramino.base_tetramino
+        if held_tetramino is None:
+            held_tetramino = self.queue.pop()
+        self.active_tetramino.reset(held_tetramino)
+        self.hold_available = False
+        return True
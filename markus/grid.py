@@ -1,25 +1,57 @@
-from functools import cache
+import os
 
-import pygame
+from tetraminos import I, J, L, O, S, T, Z
 
+EMPTY = (0, 0, 0)
+PALETTE = [EMPTY] + [piece.color for piece in (I, J, L, O, S, T, Z)]
+PALETTE_INDEX = {color: i for i, color in enumerate(PALETTE)}
 
+
+# Besides the cells, a grid keeps its surface profile up to date on every
+# insert_piece and clear_rows: the top filled row of each column (HEIGHT when
+# empty), the empty cells under those tops and the filled cells of each row.
 class Grid:
     HEIGHT = 20
     WIDTH = 10
 
     def __init__(self):
         self.grid = [[(0, 0, 0) for _ in range(Grid.WIDTH)] for _ in range(Grid.HEIGHT)]
+        self._init_profile()
+
+    def _init_profile(self):
+        # bumped on every change to the cells, so state derived from the
+        # board can be cached against it
+        self.version = 0
+        self._tops = [Grid.HEIGHT] * Grid.WIDTH
+        self._column_holes = [0] * Grid.WIDTH
+        self._row_fill = [0] * Grid.HEIGHT
 
     @staticmethod
-    @cache  # singleton
-    def get():
+    def create() -> "Grid":
+        if os.environ.get("TETRIS_GRID") == "bitboard":
+            from bitboard_grid import BitboardGrid
+
+            return BitboardGrid()
         return Grid()
 
+    # clears the board without allocating, so restarts keep memory flat
     def reset(self):
-        self.__init__()
+        for row in self.grid:
+            row[:] = EMPTY_ROW
+        self._reset_profile()
+
+    def _reset_profile(self):
+        self.version += 1
+        for x in range(Grid.WIDTH):
+            self._tops[x] = Grid.HEIGHT
+            self._column_holes[x] = 0
+        for y in range(Grid.HEIGHT):
+            self._row_fill[y] = 0
 
     def insert_piece(self, active_tetramino):
-        for x, y in active_tetramino.get_positions():
+        positions = active_tetramino.get_positions()
+        self._insert_profile(positions)
+        for x, y in positions:
             self.grid[y][x] = active_tetramino.color
 
     def fits(self, active_tetramino):
@@ -33,42 +65,129 @@ class Grid:
         return True
 
     def clear_rows(self) -> int:
-        lines_cleared = 0
+        cleared = []
         for i, row in enumerate(self.grid):
             row = self.grid[i]
             if (0, 0, 0) not in row:
-                lines_cleared += 1
+                cleared.append(i)
                 del self.grid[i]
                 self.grid.insert(0, [(0, 0, 0) for _ in range(Grid.WIDTH)])
-        return lines_cleared
-
-    def draw(self, surface: pygame.Surface, tile_size: int):
-        for i in range(Grid.HEIGHT):
-            for j in range(Grid.WIDTH):
-                pygame.draw.rect(
-                    surface,
-                    self.grid[i][j],
-                    (
-                        j * tile_size,
-                        i * tile_size,
-                        tile_size,
-                        tile_size,
-                    ),
-                    0,
-                )
-
-    def draw_gridlines(self, surface: pygame.Surface, tile_size: int):
-        for i in range(Grid.HEIGHT):
-            pygame.draw.line(
-                surface,
-                (128, 128, 128),
-                (0, i * tile_size),
-                (Grid.WIDTH * tile_size, i * tile_size),
-            )
-            for j in range(Grid.WIDTH):
-                pygame.draw.line(
-                    surface,
-                    (128, 128, 128),
-                    (j * tile_size, 0),
-                    (j * tile_size, Grid.HEIGHT * tile_size),
-                )
+        self._clear_profile(cleared)
+        return len(cleared)
+
+    def color(self, x: int, y: int) -> tuple[int, int, int]:
+        return self.grid[y][x]
+
+    def filled(self, x: int, y: int) -> bool:
+        return self.grid[y][x] != EMPTY
+
+    # row y has bit x set when cell (x, y) is filled
+    def row_bits(self) -> list[int]:
+        return [
+            sum(1 << x for x, color in enumerate(row) if color != EMPTY)
+            for row in self.grid
+        ]
+
+    # PALETTE index of every cell, row-major
+    def color_indices(self) -> bytes:
+        return bytes(PALETTE_INDEX[color] for row in self.grid for color in row)
+
+    @property
+    def heights(self) -> tuple[int, ...]:
+        return tuple(Grid.HEIGHT - top for top in self._tops)
+
+    @property
+    def holes(self) -> int:
+        return sum(self._column_holes)
+
+    @property
+    def row_fill(self) -> tuple[int, ...]:
+        return tuple(self._row_fill)
+
+    # rows the piece can fall before it lands
+    def drop_distance(self, active_tetramino) -> int:
+        table = active_tetramino.table[active_tetramino.rotation]
+        x = active_tetramino.x
+        y = active_tetramino.y
+        tops = self._tops
+        distance = Grid.HEIGHT
+        for dx, dy in table.column_bottoms:
+            free = tops[x + dx] - 1 - (y + dy)
+            if free < 0:
+                # tucked under an overhang, the surface says nothing here
+                return self._step_distance(active_tetramino, 0, 1)
+            if free < distance:
+                distance = free
+        return distance
+
+    # columns the piece can slide towards direction (-1 left, 1 right)
+    def slide_distance(self, active_tetramino, direction: int) -> int:
+        return self._step_distance(active_tetramino, direction, 0)
+
+    def _step_distance(self, active_tetramino, dx: int, dy: int) -> int:
+        x = active_tetramino.x
+        y = active_tetramino.y
+        distance = 0
+        while True:
+            active_tetramino.x += dx
+            active_tetramino.y += dy
+            if not self.fits(active_tetramino):
+                break
+            distance += 1
+        active_tetramino.x = x
+        active_tetramino.y = y
+        return distance
+
+    # Called before the cells are written. Every new cell above a column's
+    # top turns the gap down to the old top into holes, every cell below it
+    # fills one.
+    def _insert_profile(self, positions: list[tuple[int, int]]):
+        self.version += 1
+        tops = self._tops
+        holes = self._column_holes
+        for x, y in positions:
+            # on a top-out a piece can lock over the stack, or above the board
+            # where the row index wraps around like the insert does
+            y %= Grid.HEIGHT
+            if self.filled(x, y):
+                continue
+            self._row_fill[y] += 1
+            if y < tops[x]:
+                holes[x] += tops[x] - y - 1
+                tops[x] = y
+            else:
+                holes[x] -= 1
+
+    # A cleared row is full, so it lies at or below every column's top.
+    # Columns keep their holes and sink one row per cleared row, unless their
+    # top was cleared, in which case they are rescanned.
+    def _clear_profile(self, cleared: list[int]):
+        if not cleared:
+            return
+        self.version += 1
+        row_fill = self._row_fill
+        for y in cleared:
+            del row_fill[y]
+            row_fill.insert(0, 0)
+        tops = self._tops
+        for x in range(Grid.WIDTH):
+            if tops[x] in cleared:
+                self._scan_column(x)
+            else:
+                tops[x] += len(cleared)
+
+    def _scan_column(self, x: int):
+        top = Grid.HEIGHT
+        holes = 0
+        for y in range(Grid.HEIGHT):
+            if self.filled(x, y):
+                if top == Grid.HEIGHT:
+                    top = y
+            elif top != Grid.HEIGHT:
+                holes += 1
+        self._tops[x] = top
+        self._column_holes[x] = holes
+
+
+EMPTY_ROW = (EMPTY,) * Grid.WIDTH
+FULL_ROW = (1 << Grid.WIDTH) - 1  # row bits of a row without gaps
@@ -0,0 +1,137 @@
+from dataclasses import dataclass
+from typing import Optional
+
+from game import Game
+from profiler import phase
+
+DAS = 80  # ms a direction is held before it repeats
+ARR = 0  # ms between repeats, 0 slides to the wall
+GRAVITY = 1000  # ms per row
+
+LEFT = -1
+RIGHT = 1
+
+DAS_PHASE = phase("das")
+GRAVITY_PHASE = phase("gravity")
+
+
+@dataclass
+class HeldShift:
+    direction: int
+    held: bool = False
+    charged: bool = False
+    pressed_at: float = 0.0
+    next_repeat: float = 0.0
+
+    def deadline(self, das: float, arr: float) -> Optional[float]:
+        if not self.held:
+            return None
+        if not self.charged:
+            return self.pressed_at + das
+        if arr > 0:
+            return self.next_repeat
+        return None
+
+
+# Runs DAS/ARR and gravity on the timestamps of the inputs instead of on
+# frames. Every call takes the time (ms) the input happened, and advance()
+# replays each deadline that passed since the last call at the exact time it
+# fell due, so an 80 ms DAS charges after 80 ms at any frame rate.
+class InputScheduler:
+    def __init__(
+        self,
+        game: Game,
+        das: float = DAS,
+        arr: float = ARR,
+        gravity: float = GRAVITY,
+        now: float = 0.0,
+    ):
+        self.game = game
+        self.das = das
+        self.arr = arr
+        self.gravity = gravity
+        self.left = HeldShift(LEFT)
+        self.right = HeldShift(RIGHT)
+        self.reset(now)
+
+    def reset(self, now: float = 0.0):
+        for shift in (self.left, self.right):
+            shift.held = False
+            shift.charged = False
+        self.gravity_at = now + self.gravity
+
+    def next_deadline(self) -> float:
+        deadline = self.gravity_at
+        for shift in (self.left, self.right):
+            shift_deadline = shift.deadline(self.das, self.arr)
+            if shift_deadline is not None and shift_deadline < deadline:
+                deadline = shift_deadline
+        return deadline
+
+    def advance(self, now: float):
+        while True:
+            deadline = self.next_deadline()
+            if deadline > now:
+                break
+            if deadline == self.gravity_at:
+                self._fall(deadline)
+            else:
+                for shift in (self.left, self.right):
+                    if shift.deadline(self.das, self.arr) == deadline:
+                        self._repeat(shift, deadline)
+            self._slide()
+        self._slide()
+
+    def shift_down(self, direction: int, now: float):
+        self.advance(now)
+        self._move(direction)
+        shift = self._shift(direction)
+        shift.held = True
+        shift.charged = False
+        shift.pressed_at = now
+
+    def shift_up(self, direction: int, now: float):
+        self.advance(now)
+        shift = self._shift(direction)
+        shift.held = False
+        shift.charged = False
+
+    # soft drops, locks and holds restart the gravity step
+    def reset_gravity(self, now: float):
+        self.gravity_at = now + self.gravity
+
+    def _shift(self, direction: int) -> HeldShift:
+        return self.left if direction == LEFT else self.right
+
+    def _move(self, direction: int) -> bool:
+        piece = self.game.active_tetramino
+        return piece.move_left() if direction == LEFT else piece.move_right()
+
+    def _slide_piece(self, direction: int) -> bool:
+        piece = self.game.active_tetramino
+        return piece.slide_left() if direction == LEFT else piece.slide_right()
+
+    def _fall(self, at: float):
+        with GRAVITY_PHASE:
+            if not self.game.active_tetramino.move_down():
+                self.game.lock()
+            self.gravity_at = at + self.gravity
+
+    def _repeat(self, shift: HeldShift, at: float):
+        with DAS_PHASE:
+            if not shift.charged:
+                shift.charged = True
+                if self.arr <= 0:
+                    return
+                shift.next_repeat = at
+            self._move(shift.direction)
+            shift.next_repeat += self.arr
+
+    # with ARR 0 a charged direction keeps the piece against the wall
+    def _slide(self):
+        if self.arr > 0:
+            return
+        for shift in (self.left, self.right):
+            if shift.charged:
+                with DAS_PHASE:
+                    self._slide_piece(shift.direction)
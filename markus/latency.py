@@ -0,0 +1,108 @@
+import os
+import sys
+from collections import defaultdict, deque
+
+import pygame
+from render import (
+    BLOCK_SIZE,
+    TIMER_SIZE,
+    WINDOW_HEIGHT,
+    WINDOW_WIDTH,
+    glyph_cache,
+    static_layer,
+)
+
+# TETRIS_LATENCY=dump prints per-input latency histograms at exit,
+# TETRIS_LATENCY=overlay also shows the last input's latency in ms on screen
+LATENCY_MODE = os.environ.get("TETRIS_LATENCY")
+
+STAGES = ("applied", "drawn", "presented")
+OVERLAY_POSITION = (WINDOW_WIDTH - 6 * BLOCK_SIZE, WINDOW_HEIGHT - 2 * BLOCK_SIZE)
+HISTOGRAM_WIDTH = 40
+
+
+# Follows every key event from the moment the main loop reads it through the
+# tick that applied it, the end of the draw and the return of display.update,
+# all on perf_counter_ns. pygame does not expose when SDL queued the event, so
+# time spent in the event queue before the read is not included.
+class LatencyMonitor:
+    def __init__(self, overlay: bool = False):
+        self.overlay = overlay
+        self.pending = deque()  # [label, read_ns], not applied yet
+        self.in_flight = []  # [label, read_ns, applied_ns, drawn_ns]
+        self.samples = defaultdict(list)  # (label, stage) -> ns
+        self.last_ns = None
+        self._overlay_text = None
+
+    def read(self, key: int, down: bool, ns: int):
+        label = pygame.key.name(key) + ("" if down else " up")
+        self.pending.append([label, ns])
+
+    def applied(self, count: int, ns: int):
+        for _ in range(min(count, len(self.pending))):
+            self.in_flight.append(self.pending.popleft() + [ns, None])
+
+    def drawn(self, ns: int):
+        for record in self.in_flight:
+            record[3] = ns
+
+    def presented(self, ns: int):
+        for label, read_ns, applied_ns, drawn_ns in self.in_flight:
+            for stage, at in zip(STAGES, (applied_ns, drawn_ns, ns)):
+                self.samples[label, stage].append(at - read_ns)
+            self.last_ns = ns - read_ns
+        self.in_flight.clear()
+
+    # after a full redraw wiped it
+    def invalidate_overlay(self):
+        self._overlay_text = None
+
+    # draws the last input-to-present latency, returns the rect to present
+    def draw_overlay(self, window: pygame.Surface) -> list[pygame.Rect]:
+        if not self.overlay or self.last_ns is None:
+            return []
+        text = f"{self.last_ns / 1e6:.3f}"
+        if text == self._overlay_text:
+            return []
+        glyphs = glyph_cache(TIMER_SIZE)
+        layer = static_layer(window.get_size(), BLOCK_SIZE)
+        old_rect = glyphs.rect(self._overlay_text or "", OVERLAY_POSITION)
+        window.blit(layer.background, old_rect, old_rect)
+        self._overlay_text = text
+        return [old_rect.union(glyphs.draw(window, text, OVERLAY_POSITION))]
+
+    def report(self) -> str:
+        lines = []
+        for (label, stage), samples in sorted(self.samples.items()):
+            samples = sorted(samples)
+            lines.append(
+                f"{label} -> {stage}: n={len(samples)}"
+                f" p50={percentile(samples, 0.5) / 1e6:.3f}ms"
+                f" p99={percentile(samples, 0.99) / 1e6:.3f}ms"
+                f" max={samples[-1] / 1e6:.3f}ms"
+            )
+            lines += histogram(samples)
+        return "\n".join(lines)
+
+    def dump(self, file=sys.stderr):
+        print(self.report(), file=file)
+
+
+def percentile(sorted_samples: list[int], fraction: float) -> int:
+    index = min(len(sorted_samples) - 1, int(len(sorted_samples) * fraction))
+    return sorted_samples[index]
+
+
+# one row per power-of-two bucket of microseconds
+def histogram(sorted_samples: list[int]) -> list[str]:
+    buckets = defaultdict(int)
+    for ns in sorted_samples:
+        buckets[(ns // 1000).bit_length()] += 1
+    peak = max(buckets.values())
+    rows = []
+    for bucket in range(min(buckets), max(buckets) + 1):
+        count = buckets[bucket]
+        upper_us = 1 << bucket
+        bar = "#" * round(count * HISTOGRAM_WIDTH / peak)
+        rows.append(f"  <{upper_us:>7}us {count:>5} {bar}")
+    return rows
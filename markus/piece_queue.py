@@ -0,0 +1,75 @@
+import random
+from itertools import permutations
+from typing import Optional
+
+from tetraminos import ALL_TETRAMINOS, Tetramino
+
+VISIBLE_QUEUE_LENGTH = 5
+QUEUE_PIECE_HEIGHT = 3
+
+BAG_SIZE = len(ALL_TETRAMINOS)
+BAGS = tuple(permutations(ALL_TETRAMINOS))  # all 5040 orders of one bag
+RING_SIZE = 16  # power of two, at least the preview plus a bag
+RING_MASK = RING_SIZE - 1
+
+MASK64 = (1 << 64) - 1
+GAMMA = 0x9E3779B97F4A7C15
+
+
+# SplitMix64's output function. Bag k of a seed is picked by the k-th
+# SplitMix64 output, so any bag can be computed without the ones before it.
+def mix64(x: int) -> int:
+    x = (x ^ (x >> 30)) * 0xBF58476D1CE4E5B9 & MASK64
+    x = (x ^ (x >> 27)) * 0x94D049BB133111EB & MASK64
+    return x ^ (x >> 31)
+
+
+# 7-bag randomizer. The sequence only depends on the seed, so a replay can
+# rebuild it and any number of games can run side by side. Upcoming pieces
+# live in a fixed ring buffer that is refilled a whole bag at a time.
+class Queue:
+    def __init__(self, seed: Optional[int] = None):
+        self._ring: list[Optional[Tetramino]] = [None] * RING_SIZE
+        self.reset(seed)
+
+    def reset(self, seed: Optional[int] = None):
+        self.seed = seed if seed is not None else random.getrandbits(32)
+        self._state = mix64(self.seed & MASK64)
+        self.jump(0)
+
+    def bag(self, k: int) -> tuple[Tetramino, ...]:
+        return BAGS[mix64((self._state + (k + 1) * GAMMA) & MASK64) % len(BAGS)]
+
+    # the n-th piece of the sequence, counting from 0
+    def piece(self, n: int) -> Tetramino:
+        return self.bag(n // BAG_SIZE)[n % BAG_SIZE]
+
+    # makes piece n the next one popped
+    def jump(self, n: int):
+        self.position = n
+        self._end = n - n % BAG_SIZE
+        self._fill(VISIBLE_QUEUE_LENGTH)
+
+    def _fill(self, count: int):
+        ring = self._ring
+        while self._end < self.position + count:
+            for piece in self.bag(self._end // BAG_SIZE):
+                ring[self._end & RING_MASK] = piece
+                self._end += 1
+
+    def pop(self) -> Tetramino:
+        piece = self._ring[self.position & RING_MASK]
+        self.position += 1
+        self._fill(VISIBLE_QUEUE_LENGTH)
+        return piece
+
+    def peek(self) -> Tetramino:
+        return self._ring[self.position & RING_MASK]
+
+    def preview(self, count: int = VISIBLE_QUEUE_LENGTH) -> list[Tetramino]:
+        if count > RING_SIZE - BAG_SIZE + 1:
+            raise ValueError("preview longer than the ring buffer")
+        self._fill(count)
+        ring = self._ring
+        position = self.position
+        return [ring[(position + i) & RING_MASK] for i in range(count)]
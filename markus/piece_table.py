@@ -0,0 +1,56 @@
+from dataclasses import dataclass
+
+# shapes are drawn on a 5x5 grid, this moves the cell at (2, 4) onto the
+# piece's (x, y)
+SHAPE_OFFSET = (-2, -4)
+
+
+@dataclass(frozen=True)
+class RotationTable:
+    cells: tuple[tuple[int, int], ...]
+    # (dy, mask) for every occupied row, bit 0 of mask is column min_x
+    row_masks: tuple[tuple[int, int], ...]
+    # (dy, set bits of mask) for every occupied row
+    row_offsets: tuple[tuple[int, tuple[int, ...]], ...]
+    min_x: int
+    max_x: int
+    min_y: int
+    max_y: int
+    # (dx, dy) of the lowest cell in every occupied column
+    column_bottoms: tuple[tuple[int, int], ...]
+
+
+def compile_shape(shape: list[str]) -> RotationTable:
+    cells = tuple(
+        (j + SHAPE_OFFSET[0], i + SHAPE_OFFSET[1])
+        for i, line in enumerate(shape)
+        for j, column in enumerate(line)
+        if column == "0"
+    )
+    min_x = min(x for x, _ in cells)
+    max_x = max(x for x, _ in cells)
+
+    row_masks = {}
+    column_bottoms = {}
+    for x, y in cells:
+        row_masks[y] = row_masks.get(y, 0) | 1 << (x - min_x)
+        column_bottoms[x] = max(column_bottoms.get(x, y), y)
+
+    row_masks = tuple(sorted(row_masks.items()))
+    return RotationTable(
+        cells,
+        row_masks,
+        tuple(
+            (y, tuple(b for b in range(mask.bit_length()) if mask >> b & 1))
+            for y, mask in row_masks
+        ),
+        min_x,
+        max_x,
+        min(y for _, y in cells),
+        max(y for _, y in cells),
+        tuple(sorted(column_bottoms.items())),
+    )
+
+
+def compile_shapes(shapes: list[list[str]]) -> tuple[RotationTable, ...]:
+    return tuple(compile_shape(shape) for shape in shapes)
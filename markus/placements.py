@@ -0,0 +1,194 @@
+from dataclasses import dataclass
+from typing import Optional
+
+from actions import (
+    HARD_DROP,
+    MOVE_LEFT,
+    MOVE_RIGHT,
+    ROTATE_180,
+    ROTATE_CCW,
+    ROTATE_CW,
+    SOFT_DROP,
+)
+from active_tetramino import ActiveTetramino
+from grid import Grid
+from tetraminos import Tetramino
+
+# the single inputs the search tries from every state, in the order ties are
+# broken; each one is an action tap for the Simulation
+MOVES = (
+    (MOVE_LEFT, -1, 0),
+    (MOVE_RIGHT, 1, 0),
+    (ROTATE_CW, 0, 1),
+    (ROTATE_CCW, 0, 3),
+    (ROTATE_180, 0, 2),
+)
+DROP = SOFT_DROP  # falls all the way down
+# taps by the index the search links states with
+INPUTS = tuple(tap for tap, _, _ in MOVES) + (DROP,)
+DROP_INDEX = len(MOVES)
+
+# states are packed as (rotation * 64 + y + 16) * 32 + x + 8
+X_BIAS = 8
+Y_BIAS = 16
+
+
+def pack(x: int, y: int, rotation: int) -> int:
+    return (rotation * 64 + y + Y_BIAS) * 32 + x + X_BIAS
+
+
+def unpack(key: int) -> tuple[int, int, int]:
+    return key % 32 - X_BIAS, key // 32 % 64 - Y_BIAS, key // 2048
+
+
+# Where a piece ends up and the taps that put it there, ending on the hard
+# drop that locks it.
+@dataclass
+class Placement:
+    piece: Tetramino
+    x: int
+    y: int
+    rotation: int
+    path: tuple[int, ...]
+
+    def positions(self) -> list[tuple[int, int]]:
+        x = self.x
+        y = self.y
+        return [(x + dx, y + dy) for dx, dy in self.piece.table[self.rotation].cells]
+
+
+def placements(grid: Grid, piece: ActiveTetramino) -> list[Placement]:
+    tops = [Grid.HEIGHT - height for height in grid.heights]
+    return search(
+        grid.row_bits(), tops, piece.base_tetramino, piece.x, piece.y, piece.rotation
+    )
+
+
+# Breadth-first search over every (x, y, rotation) a piece can reach from
+# the given state with the engine's own inputs: shifts, the three rotations
+# (no kicks, a rotation that does not fit fails) and the drop, so tucks and
+# spins under overhangs are found too. Gravity is left out, a bot taps far
+# faster than one row a second. Placements with the same cells, like the
+# rotations of an O, are reported once, with the shortest path.
+#
+# rows are the board as Grid.row_bits() and tops the first filled row of
+# every column, so a search can run on a board that only exists as those.
+def search(
+    rows: list[int],
+    tops: list[int],
+    tetramino: Tetramino,
+    x: int = 4,
+    y: int = 2,
+    rotation: int = 0,
+) -> list[Placement]:
+    tables = tetramino.table
+    # the row masks read top to bottom, 4 bits a row, name the cells of a
+    # rotation up to where they sit, so rotations with the same cells match
+    shapes = [
+        sum(mask << 4 * i for i, (_, mask) in enumerate(table.row_masks))
+        for table in tables
+    ]
+    # fit_masks[key >> 5] has bit key & 31 set when the state fits, filled
+    # in one (rotation, y) line at a time as the search gets there
+    fit_masks: list[Optional[int]] = [None] * 256
+
+    def fit_mask(line: int) -> int:
+        table = tables[line >> 6]
+        y = (line & 63) - Y_BIAS
+        if y + table.max_y >= Grid.HEIGHT:
+            fit_masks[line] = 0
+            return 0
+        # bit s of row >> b is set when shifting cell b of the mask s
+        # columns right of min_x hits a filled cell
+        blocked = 0
+        for dy, offsets in table.row_offsets:
+            if y + dy >= 0:
+                row = rows[y + dy]
+                if row:
+                    for b in offsets:
+                        blocked |= row >> b
+        shifts = (1 << Grid.WIDTH - table.max_x + table.min_x) - 1 & ~blocked
+        mask = fit_masks[line] = shifts << X_BIAS - table.min_x
+        return mask
+
+    # key of the state a piece in the same column and rotation lands on
+    # when it starts above the stack, by the state's key with y cleared
+    surfaces: dict[int, int] = {}
+
+    def surface(column: int) -> int:
+        x, _, rotation = unpack(column)
+        y = Grid.HEIGHT * 2
+        for dx, dy in tables[rotation].column_bottoms:
+            if tops[x + dx] - 1 - dy < y:
+                y = tops[x + dx] - 1 - dy
+        key = surfaces[column] = pack(x, y, rotation)
+        return key
+
+    # the packed state delta of every input, by rotation
+    moves = [
+        [
+            (index, dx + ((rotation + turn & 3) - rotation) * 2048)
+            for index, (_, dx, turn) in enumerate(MOVES)
+        ]
+        for rotation in range(4)
+    ]
+    # turns a landed state into the key of the cells it covers
+    lock_offsets = [
+        (shapes[rotation] - rotation << 11) + table.min_y * 32 + table.min_x
+        for rotation, table in enumerate(tables)
+    ]
+
+    start = pack(x, y, rotation)
+    if not fit_mask(start >> 5) >> (start & 31) & 1:
+        return []
+    # state -> previous state << 3 | input index, -1 for the start
+    parents = {start: -1}
+    # breadth-first as the loop also walks the states appended during it
+    frontier = [start]
+    push = frontier.append
+    locks = {}
+    for key in frontier:
+        rotation = key >> 11
+        column = key & ~0x7E0  # y cleared
+        low = surfaces.get(column)
+        if low is None:
+            low = surface(column)
+        if key > low:
+            # under an overhang, step down
+            low = key
+            while True:
+                below = low + 32
+                mask = fit_masks[below >> 5]
+                if mask is None:
+                    mask = fit_mask(below >> 5)
+                if not mask >> (below & 31) & 1:
+                    break
+                low = below
+        lock = low + lock_offsets[rotation]
+        if lock not in locks:
+            locks[lock] = (key, low)
+        if low != key and low not in parents:
+            parents[low] = key << 3 | DROP_INDEX
+            push(low)
+        for index, delta in moves[rotation]:
+            moved = key + delta
+            if moved in parents:
+                continue
+            mask = fit_masks[moved >> 5]
+            if mask is None:
+                mask = fit_mask(moved >> 5)
+            if mask >> (moved & 31) & 1:
+                parents[moved] = key << 3 | index
+                push(moved)
+
+    result = []
+    for key, low in locks.values():
+        path = [HARD_DROP]
+        parent = parents[key]
+        while parent >= 0:
+            path.append(INPUTS[parent & 7])
+            parent = parents[parent >> 3]
+        path.reverse()
+        x, y, rotation = unpack(low)
+        result.append(Placement(tetramino, x, y, rotation, tuple(path)))
+    return result
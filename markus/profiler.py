@@ -0,0 +1,101 @@
+import json
+import os
+from array import array
+from time import perf_counter_ns
+
+# TETRIS_PROFILE=trace.json records every phase and writes a Chrome
+# trace_event file there at exit (open it in chrome://tracing or Perfetto)
+PROFILE_PATH = os.environ.get("TETRIS_PROFILE")
+
+RING_CAPACITY = 1 << 16
+
+
+# The last RING_CAPACITY phase timings in preallocated arrays, so recording
+# one is two clock reads and three stores.
+class Profiler:
+    def __init__(self, capacity: int = RING_CAPACITY):
+        self.capacity = capacity
+        self.names: list[str] = [""] * capacity
+        self.starts = array("q", bytes(8 * capacity))
+        self.durations = array("q", bytes(8 * capacity))
+        self.count = 0
+
+    def record(self, name: str, start_ns: int, end_ns: int):
+        i = self.count % self.capacity
+        self.names[i] = name
+        self.starts[i] = start_ns
+        self.durations[i] = end_ns - start_ns
+        self.count += 1
+
+    # oldest first
+    def events(self) -> list[tuple[str, int, int]]:
+        first = max(0, self.count - self.capacity)
+        return [
+            (
+                self.names[i % self.capacity],
+                self.starts[i % self.capacity],
+                self.durations[i % self.capacity],
+            )
+            for i in range(first, self.count)
+        ]
+
+    def trace(self) -> dict:
+        return {
+            "traceEvents": [
+                {
+                    "name": name,
+                    "ph": "X",
+                    "ts": start_ns / 1000,
+                    "dur": duration_ns / 1000,
+                    "pid": 1,
+                    "tid": 1,
+                }
+                for name, start_ns, duration_ns in self.events()
+            ],
+            "displayTimeUnit": "ms",
+        }
+
+    def write(self, path: str):
+        with open(path, "w") as f:
+            json.dump(self.trace(), f)
+
+
+PROFILER = Profiler() if PROFILE_PATH else None
+
+
+# A named span: "with GRAVITY_PHASE: ..." records how long the block took.
+# Spans of the same name do not nest, which holds for every phase of a frame.
+class Phase:
+    def __init__(self, name: str, profiler: Profiler):
+        self.name = name
+        self.profiler = profiler
+        self.start_ns = 0
+
+    def __enter__(self):
+        self.start_ns = perf_counter_ns()
+
+    def __exit__(self, *exc_info):
+        self.profiler.record(self.name, self.start_ns, perf_counter_ns())
+
+
+class NullPhase:
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+NULL_PHASE = NullPhase()
+
+
+# with profiling off every phase is the same do-nothing context manager
+def phase(name: str):
+    if PROFILER is None:
+        return NULL_PHASE
+    return Phase(name, PROFILER)
+
+
+def write_profile(path: str = PROFILE_PATH):
+    if PROFILER is not None and path:
+        PROFILER.write(path)
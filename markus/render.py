@@ -0,0 +1,554 @@
+import os
+from functools import cache, lru_cache
+from typing import Optional
+
+import pygame
+from game import Snapshot
+from grid import EMPTY, PALETTE, PALETTE_INDEX, Grid
+from piece_queue import QUEUE_PIECE_HEIGHT, VISIBLE_QUEUE_LENGTH
+from profiler import phase
+from tetraminos import ALL_TETRAMINOS, Tetramino
+
+WINDOW_WIDTH = 800
+WINDOW_HEIGHT = 700
+S_WIDTH = 800
+S_HEIGHT = 700
+BLOCK_SIZE = 32
+PLAY_WIDTH = BLOCK_SIZE * Grid.WIDTH
+PLAY_HEIGHT = BLOCK_SIZE * Grid.HEIGHT
+
+top_left_x = (S_WIDTH - PLAY_WIDTH) // 2
+top_left_y = S_HEIGHT - PLAY_HEIGHT
+
+BACKGROUND_COLOR = (0, 0, 0)
+GRIDLINE_COLOR = (128, 128, 128)
+COLORKEY = (255, 0, 255)  # never used by a piece
+
+# TETRIS_RENDER=indexed draws the board through IndexedBoard
+INDEXED_BOARD = os.environ.get("TETRIS_RENDER") == "indexed"
+
+BOARD_PHASE = phase("board_cells")
+GRID_PHASE = phase("draw_grid")
+GHOST_PHASE = phase("draw_ghost")
+ACTIVE_PHASE = phase("draw_active")
+QUEUE_PHASE = phase("draw_queue")
+GRIDLINES_PHASE = phase("draw_gridlines")
+HOLD_PHASE = phase("draw_hold")
+TEXT_PHASE = phase("draw_text")
+UPDATE_PHASE = phase("display_update")
+
+
+TEXT_COLOR = (255, 255, 255)
+
+
+@cache
+def font(size: int = 64) -> pygame.font.Font:
+    pygame.font.init()
+    return pygame.font.Font(pygame.font.get_default_font(), size)
+
+
+# Every character a counter or timer can show, rendered once. Text is laid out
+# by each glyph's advance and drawn with one blits() call, so a value that
+# changes every frame never goes through the font rasteriser.
+class GlyphCache:
+    CHARACTERS = "-0123456789:."
+
+    def __init__(self, size: int, color: tuple[int, int, int] = TEXT_COLOR):
+        glyph_font = font(size)
+        self.height = glyph_font.get_height()
+        self.glyphs = {}
+        self.advances = {}
+        for char in self.CHARACTERS:
+            self.glyphs[char] = glyph_font.render(char, False, color)
+            self.advances[char] = glyph_font.metrics(char)[0][4]
+
+    def rect(self, text: str, position: tuple[int, int]) -> pygame.Rect:
+        width = sum(self.advances[char] for char in text)
+        return pygame.Rect(position, (width, self.height))
+
+    def draw(
+        self, surface: pygame.Surface, text: str, position: tuple[int, int]
+    ) -> pygame.Rect:
+        x, y = position
+        blits = []
+        for char in text:
+            blits.append((self.glyphs[char], (x, y)))
+            x += self.advances[char]
+        surface.blits(blits, doreturn=False)
+        return self.rect(text, position)
+
+
+@cache
+def glyph_cache(size: int) -> GlyphCache:
+    return GlyphCache(size)
+
+
+# elapsed sprint time as mm:ss.mmm
+def format_time(elapsed_ms: int) -> str:
+    seconds, ms = divmod(elapsed_ms, 1000)
+    minutes, seconds = divmod(seconds, 60)
+    return f"{minutes:02d}:{seconds:02d}.{ms:03d}"
+
+
+def ghost_color(color: tuple[int, int, int]) -> tuple[int, int, int]:
+    return (color[0] // 2, color[1] // 2, color[2] // 2)
+
+
+# One pre-rendered tile per cell colour. Every board cell, piece and preview is
+# blitted from here, so a skin only has to change how tiles are drawn.
+class TileAtlas:
+    def __init__(self, tile_size: int):
+        self.tile_size = tile_size
+        self.tiles = {}
+        self.tile(EMPTY)
+        for piece in ALL_TETRAMINOS:
+            self.tile(piece.color)
+            self.tile(ghost_color(piece.color))
+
+    def tile(self, color: tuple[int, int, int]) -> pygame.Surface:
+        tile = self.tiles.get(color)
+        if tile is None:
+            tile = pygame.Surface((self.tile_size, self.tile_size))
+            tile.fill(color)
+            self.tiles[color] = tile
+        return tile
+
+
+@lru_cache(maxsize=1)
+def tile_atlas(tile_size: int) -> TileAtlas:
+    return TileAtlas(tile_size)
+
+
+# cells are PALETTE indices, row-major, as in Snapshot.cells
+def draw_grid(surface: pygame.Surface, cells: bytes, tile_size: int):
+    tile = tile_atlas(tile_size).tile
+    surface.blits(
+        [
+            (
+                tile(PALETTE[cells[i * Grid.WIDTH + j]]),
+                (j * tile_size, i * tile_size),
+            )
+            for i in range(Grid.HEIGHT)
+            for j in range(Grid.WIDTH)
+        ],
+        doreturn=False,
+    )
+
+
+def draw_gridlines(surface: pygame.Surface, tile_size: int):
+    for i in range(Grid.HEIGHT):
+        pygame.draw.line(
+            surface,
+            GRIDLINE_COLOR,
+            (0, i * tile_size),
+            (Grid.WIDTH * tile_size, i * tile_size),
+        )
+    for j in range(Grid.WIDTH):
+        pygame.draw.line(
+            surface,
+            GRIDLINE_COLOR,
+            (j * tile_size, 0),
+            (j * tile_size, Grid.HEIGHT * tile_size),
+        )
+
+
+# Everything that only depends on the window and tile size, drawn once:
+# the window background and a colour-keyed gridline overlay for the board.
+class StaticLayer:
+    def __init__(self, size: tuple[int, int], tile_size: int):
+        self.background = pygame.Surface(size)
+        self.background.fill(BACKGROUND_COLOR)
+
+        self.gridlines = pygame.Surface(
+            (Grid.WIDTH * tile_size, Grid.HEIGHT * tile_size)
+        )
+        self.gridlines.fill(COLORKEY)
+        draw_gridlines(self.gridlines, tile_size)
+        self.gridlines.set_colorkey(COLORKEY)
+
+
+@lru_cache(maxsize=1)
+def static_layer(size: tuple[int, int], tile_size: int) -> StaticLayer:
+    return StaticLayer(size, tile_size)
+
+
+def draw_piece(
+    surface: pygame.Surface,
+    positions: list[tuple[int, int]],
+    color: tuple[int, int, int],
+    tile_size: int,
+    offset: tuple[int, int] = (0, 0),
+):
+    tile = tile_atlas(tile_size).tile(color)
+    surface.blits(
+        [
+            (tile, (x * tile_size + offset[0], y * tile_size + offset[1]))
+            for x, y in positions
+        ],
+        doreturn=False,
+    )
+
+
+def spawn_positions(tetramino: Tetramino, x=4, y=2) -> list[tuple[int, int]]:
+    return [(x + dx, y + dy) for dx, dy in tetramino.table[0].cells]
+
+
+def draw_active(surface: pygame.Surface, snapshot: Snapshot, tile_size: int):
+    draw_piece(surface, snapshot.positions, snapshot.piece.color, tile_size)
+
+
+def draw_ghost(surface: pygame.Surface, snapshot: Snapshot, tile_size: int):
+    draw_piece(
+        surface,
+        snapshot.ghost_positions,
+        ghost_color(snapshot.piece.color),
+        tile_size,
+    )
+
+
+def draw_queue(surface: pygame.Surface, queue: tuple[Tetramino, ...], tile_size: int):
+    for i, piece in enumerate(queue):
+        y_offset = tile_size * (i * QUEUE_PIECE_HEIGHT + 1)
+        x_offset = -3 * tile_size
+        draw_piece(
+            surface,
+            spawn_positions(piece),
+            piece.color,
+            tile_size,
+            (x_offset, y_offset),
+        )
+
+
+GRID_RECT = pygame.Rect(
+    WINDOW_WIDTH // 2 - Grid.WIDTH * BLOCK_SIZE // 2,
+    WINDOW_HEIGHT - PLAY_HEIGHT,
+    BLOCK_SIZE * Grid.WIDTH,
+    BLOCK_SIZE * Grid.HEIGHT,
+)
+QUEUE_RECT = pygame.Rect(
+    WINDOW_WIDTH - 6 * BLOCK_SIZE,
+    WINDOW_HEIGHT - PLAY_HEIGHT,
+    BLOCK_SIZE * 4,
+    BLOCK_SIZE * QUEUE_PIECE_HEIGHT * VISIBLE_QUEUE_LENGTH,
+)
+HOLD_RECT = pygame.Rect(
+    BLOCK_SIZE * 2,
+    WINDOW_HEIGHT - PLAY_HEIGHT + BLOCK_SIZE,
+    BLOCK_SIZE * 10,
+    BLOCK_SIZE * 15,
+)
+TEXT_POSITION = (BLOCK_SIZE * 2, WINDOW_HEIGHT - BLOCK_SIZE * 4)
+TEXT_SIZE = 64
+TIMER_POSITION = (BLOCK_SIZE * 2, WINDOW_HEIGHT - BLOCK_SIZE * 2)
+TIMER_SIZE = 32
+
+
+def draw_frame(
+    window: pygame.Surface,
+    snapshot: Snapshot,
+    elapsed_ms: int = 0,
+    indexed: bool = INDEXED_BOARD,
+):
+    layer = static_layer(window.get_size(), BLOCK_SIZE)
+    window.blit(layer.background, (0, 0))
+
+    grid_surface = window.subsurface(GRID_RECT)
+    queue_surface = window.subsurface(QUEUE_RECT)
+    hold_piece_surface = window.subsurface(HOLD_RECT)
+
+    if indexed:
+        with GRID_PHASE:
+            board = indexed_board(BLOCK_SIZE)
+            board_indices(snapshot, board.cells)
+            board.draw(grid_surface)
+    else:
+        with GRID_PHASE:
+            draw_grid(grid_surface, snapshot.cells, BLOCK_SIZE)
+        with GHOST_PHASE:
+            draw_ghost(grid_surface, snapshot, BLOCK_SIZE)
+        with ACTIVE_PHASE:
+            draw_active(grid_surface, snapshot, BLOCK_SIZE)
+    with QUEUE_PHASE:
+        draw_queue(queue_surface, snapshot.queue, BLOCK_SIZE)
+    with GRIDLINES_PHASE:
+        grid_surface.blit(layer.gridlines, (0, 0))
+    if snapshot.held is not None:
+        with HOLD_PHASE:
+            draw_piece(
+                hold_piece_surface,
+                spawn_positions(snapshot.held, 1, 3),
+                snapshot.held.color,
+                BLOCK_SIZE,
+            )
+
+    with TEXT_PHASE:
+        glyph_cache(TEXT_SIZE).draw(window, str(snapshot.lines_left), TEXT_POSITION)
+        glyph_cache(TIMER_SIZE).draw(window, format_time(elapsed_ms), TIMER_POSITION)
+
+
+def draw(
+    window: pygame.Surface,
+    snapshot: Snapshot,
+    elapsed_ms: int = 0,
+    indexed: bool = INDEXED_BOARD,
+):
+    draw_frame(window, snapshot, elapsed_ms, indexed)
+    with UPDATE_PHASE:
+        pygame.display.update()
+
+
+# colours of the 200 board cells as they appear on screen, row-major
+def board_colors(snapshot: Snapshot) -> list[tuple[int, int, int]]:
+    colors = [PALETTE[index] for index in snapshot.cells]
+    color = snapshot.piece.color
+    for positions, color in (
+        (snapshot.ghost_positions, ghost_color(color)),
+        (snapshot.positions, color),
+    ):
+        for x, y in positions:
+            if y >= 0:
+                colors[y * Grid.WIDTH + x] = color
+    return colors
+
+
+# the ghost of PALETTE[i] is BOARD_PALETTE[GHOST_INDEX + i]
+GHOST_INDEX = len(PALETTE)
+BOARD_PALETTE = PALETTE + [ghost_color(color) for color in PALETTE]
+
+
+# board_colors() as BOARD_PALETTE indices, written into cells
+def board_indices(snapshot: Snapshot, cells: bytearray) -> bytearray:
+    cells[:] = snapshot.cells
+    index = PALETTE_INDEX[snapshot.piece.color]
+    for positions, value in (
+        (snapshot.ghost_positions, GHOST_INDEX + index),
+        (snapshot.positions, index),
+    ):
+        for x, y in positions:
+            if y >= 0:
+                cells[y * Grid.WIDTH + x] = value
+    return cells
+
+
+# The board as a 10x20 8-bit surface sharing memory with cells, one pixel per
+# cell. Drawing converts those 200 pixels to the target format and scales them
+# straight into the target, however full the board is.
+class IndexedBoard:
+    def __init__(self, tile_size: int):
+        self.tile_size = tile_size
+        self.cells = bytearray(Grid.WIDTH * Grid.HEIGHT)
+        self.surface = pygame.image.frombuffer(
+            self.cells, (Grid.WIDTH, Grid.HEIGHT), "P"
+        )
+        self.surface.set_palette(BOARD_PALETTE)
+        self.converted = None
+
+    # surface is board-sized; only the rows first..last are repainted
+    def draw(
+        self, surface: pygame.Surface, first: int = 0, last: int = Grid.HEIGHT
+    ) -> pygame.Rect:
+        if self.converted is None:
+            self.converted = self.surface.convert(surface)
+        rows = pygame.Rect(0, first, Grid.WIDTH, last - first)
+        self.converted.blit(self.surface, rows, rows)
+        area = pygame.Rect(
+            0, first * self.tile_size, surface.get_width(), rows.height * self.tile_size
+        )
+        pygame.transform.scale(
+            self.converted.subsurface(rows), area.size, surface.subsurface(area)
+        )
+        return area
+
+
+@lru_cache(maxsize=1)
+def indexed_board(tile_size: int) -> IndexedBoard:
+    return IndexedBoard(tile_size)
+
+
+# window rect covering the given cells of a surface placed at origin
+def cells_rect(
+    positions: list[tuple[int, int]],
+    origin: tuple[int, int],
+    offset: tuple[int, int] = (0, 0),
+) -> pygame.Rect:
+    min_x = min(x for x, _ in positions)
+    min_y = min(y for _, y in positions)
+    max_x = max(x for x, _ in positions)
+    max_y = max(y for _, y in positions)
+    return pygame.Rect(
+        origin[0] + offset[0] + min_x * BLOCK_SIZE,
+        origin[1] + offset[1] + min_y * BLOCK_SIZE,
+        (max_x - min_x + 1) * BLOCK_SIZE,
+        (max_y - min_y + 1) * BLOCK_SIZE,
+    )
+
+
+# Draws the same frames as draw(), but remembers what is on screen and only
+# repaints and presents the cells, preview slots and text that changed.
+# With indexed=True the board is an IndexedBoard and the changed rows are
+# repainted as one band.
+class Renderer:
+    def __init__(self, indexed: bool = INDEXED_BOARD):
+        self.indexed = indexed
+        self.invalidate()
+
+    def invalidate(self):
+        self._size = None
+        self._layer = None
+        self._board = []
+        self._queue = []
+        self._held = None
+        self._text = None
+        self._timer = None
+
+    def draw(self, window: pygame.Surface, snapshot: Snapshot, elapsed_ms: int = 0):
+        self.present(self.paint(window, snapshot, elapsed_ms))
+
+    # Draws the frame into window without presenting it. Returns the rects
+    # that changed, or None when the whole window was redrawn.
+    def paint(
+        self, window: pygame.Surface, snapshot: Snapshot, elapsed_ms: int = 0
+    ) -> Optional[list[pygame.Rect]]:
+        with BOARD_PHASE:
+            if self.indexed:
+                cells = indexed_board(BLOCK_SIZE).cells
+                board = bytes(board_indices(snapshot, cells))
+            else:
+                board = board_colors(snapshot)
+        queue = snapshot.queue
+        text = str(snapshot.lines_left)
+        timer = format_time(elapsed_ms)
+        self._layer = static_layer(window.get_size(), BLOCK_SIZE)
+
+        if window.get_size() != self._size:
+            draw_frame(window, snapshot, elapsed_ms, self.indexed)
+            dirty = None
+        else:
+            with GRID_PHASE:
+                if self.indexed:
+                    dirty = self._draw_indexed_board(window, board)
+                else:
+                    dirty = self._draw_board(window, board)
+            with QUEUE_PHASE:
+                dirty += self._draw_queue(window, queue)
+            with HOLD_PHASE:
+                dirty += self._draw_held(window, snapshot.held)
+            with TEXT_PHASE:
+                if text != self._text:
+                    dirty.append(
+                        self._draw_text(
+                            window, TEXT_SIZE, TEXT_POSITION, self._text, text
+                        )
+                    )
+                if timer != self._timer:
+                    dirty.append(
+                        self._draw_text(
+                            window, TIMER_SIZE, TIMER_POSITION, self._timer, timer
+                        )
+                    )
+
+        self._size = window.get_size()
+        self._board = board
+        self._queue = queue
+        self._held = snapshot.held
+        self._text = text
+        self._timer = timer
+        return dirty
+
+    @staticmethod
+    def present(dirty: Optional[list[pygame.Rect]]):
+        with UPDATE_PHASE:
+            if dirty is None:
+                pygame.display.update()
+            elif dirty:
+                pygame.display.update(dirty)
+
+    def _draw_board(self, window: pygame.Surface, board) -> list[pygame.Rect]:
+        tile = tile_atlas(BLOCK_SIZE).tile
+        gridlines = self._layer.gridlines
+        dirty = []
+        tiles = []
+        lines = []
+        for i, (old, new) in enumerate(zip(self._board, board)):
+            if old == new:
+                continue
+            rect = pygame.Rect(
+                GRID_RECT.x + i % Grid.WIDTH * BLOCK_SIZE,
+                GRID_RECT.y + i // Grid.WIDTH * BLOCK_SIZE,
+                BLOCK_SIZE,
+                BLOCK_SIZE,
+            )
+            tiles.append((tile(new), rect))
+            lines.append((gridlines, rect, rect.move(-GRID_RECT.x, -GRID_RECT.y)))
+            dirty.append(rect)
+        window.blits(tiles, doreturn=False)
+        window.blits(lines, doreturn=False)
+        return dirty
+
+    def _draw_indexed_board(self, window: pygame.Surface, board) -> list[pygame.Rect]:
+        width = Grid.WIDTH
+        changed = [
+            y
+            for y in range(Grid.HEIGHT)
+            if board[y * width : (y + 1) * width]
+            != self._board[y * width : (y + 1) * width]
+        ]
+        if not changed:
+            return []
+        area = indexed_board(BLOCK_SIZE).draw(
+            window.subsurface(GRID_RECT), changed[0], changed[-1] + 1
+        )
+        rect = area.move(GRID_RECT.topleft)
+        window.blit(self._layer.gridlines, rect, area)
+        return [rect]
+
+    def _redraw_piece(
+        self,
+        window: pygame.Surface,
+        old: Tetramino,
+        new: Tetramino,
+        origin: tuple[int, int],
+        offset: tuple[int, int],
+        x: int,
+        y: int,
+    ) -> list[pygame.Rect]:
+        if old is new:
+            return []
+        dirty = []
+        if old is not None:
+            rect = cells_rect(spawn_positions(old, x, y), origin, offset)
+            window.blit(self._layer.background, rect, rect)
+            dirty.append(rect)
+        if new is not None:
+            positions = spawn_positions(new, x, y)
+            window_offset = (origin[0] + offset[0], origin[1] + offset[1])
+            draw_piece(window, positions, new.color, BLOCK_SIZE, window_offset)
+            dirty.append(cells_rect(positions, origin, offset))
+        return dirty
+
+    def _draw_queue(self, window: pygame.Surface, queue) -> list[pygame.Rect]:
+        dirty = []
+        for i, (old, new) in enumerate(zip(self._queue, queue)):
+            offset = (-3 * BLOCK_SIZE, BLOCK_SIZE * (i * QUEUE_PIECE_HEIGHT + 1))
+            dirty += self._redraw_piece(
+                window, old, new, QUEUE_RECT.topleft, offset, 4, 2
+            )
+        return dirty
+
+    def _draw_held(self, window: pygame.Surface, held) -> list[pygame.Rect]:
+        return self._redraw_piece(
+            window, self._held, held, HOLD_RECT.topleft, (0, 0), 1, 3
+        )
+
+    def _draw_text(
+        self,
+        window: pygame.Surface,
+        size: int,
+        position: tuple[int, int],
+        old: str,
+        new: str,
+    ) -> pygame.Rect:
+        glyphs = glyph_cache(size)
+        old_rect = glyphs.rect(old, position)
+        window.blit(self._layer.background, old_rect, old_rect)
+        return old_rect.union(glyphs.draw(window, new, position))
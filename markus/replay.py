@@ -0,0 +1,186 @@
+import os
+import struct
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Optional
+
+from actions import ACTION_COUNT, OTHER, RESTART
+from game import SPRINT_LINES
+from simulation import TICK_MS, Simulation
+
+# TETRIS_RECORD=dir saves every finished sprint there as a .replay file
+RECORD_DIR = os.environ.get("TETRIS_RECORD")
+
+MAGIC = b"MTRP"
+VERSION = 3  # 2: counter-based 7-bag queue, 3: flags byte
+HEADER = struct.Struct("<4sBI")  # magic, version, seed
+BOT_FLAG = 1  # played by bot.py, not from the keyboard
+
+
+# One sprint: the queue seed plus every input as (ms since the simulation
+# started, action, down), and the result the recording ended with.
+#
+# Encoded as the header and a flags byte, then LEB128 varints for
+# finished_at + 1 (0 when the sprint was not finished), lines cleared and the
+# event count, then per event
+# the varint delta to the previous event and one byte action << 1 | down.
+# A 40-line sprint is a few KB.
+@dataclass(frozen=True)
+class Replay:
+    seed: int
+    events: tuple[tuple[int, int, bool], ...]
+    finished_at: Optional[int] = None
+    lines_cleared: int = 0
+    bot: bool = False
+
+    # ms from the first key press to the last lock, as shown by the timer
+    @property
+    def final_time(self) -> Optional[int]:
+        if self.finished_at is None:
+            return None
+        started_at = next(
+            (at for at, action, down in self.events if down and action != RESTART),
+            None,
+        )
+        if started_at is None:
+            return None
+        return self.finished_at - started_at
+
+    def encode(self) -> bytes:
+        out = bytearray(HEADER.pack(MAGIC, VERSION, self.seed))
+        out.append(BOT_FLAG if self.bot else 0)
+        write_varint(out, 0 if self.finished_at is None else self.finished_at + 1)
+        write_varint(out, self.lines_cleared)
+        write_varint(out, len(self.events))
+        previous = 0
+        for at, action, down in self.events:
+            write_varint(out, at - previous)
+            out.append(action << 1 | down)
+            previous = at
+        return bytes(out)
+
+    @staticmethod
+    def decode(data: bytes) -> "Replay":
+        if len(data) < HEADER.size:
+            raise ValueError("truncated replay")
+        magic, version, seed = HEADER.unpack_from(data)
+        # version 2 has no flags byte, every run in it was played by hand
+        if magic != MAGIC or version not in (2, VERSION):
+            raise ValueError("not a version %d replay" % VERSION)
+        pos = HEADER.size
+        flags = 0
+        try:
+            if version == VERSION:
+                flags = data[pos]
+                pos += 1
+            finished_at, pos = read_varint(data, pos)
+            lines_cleared, pos = read_varint(data, pos)
+            count, pos = read_varint(data, pos)
+            events = []
+            at = 0
+            for _ in range(count):
+                delta, pos = read_varint(data, pos)
+                at += delta
+                action = data[pos] >> 1
+                if action >= ACTION_COUNT:
+                    action = OTHER
+                events.append((at, action, bool(data[pos] & 1)))
+                pos += 1
+        except IndexError:
+            raise ValueError("truncated replay") from None
+        if pos != len(data):
+            raise ValueError("trailing data after replay")
+        return Replay(
+            seed,
+            tuple(events),
+            finished_at - 1 if finished_at else None,
+            lines_cleared,
+            bool(flags & BOT_FLAG),
+        )
+
+    def save(self, path: str):
+        with open(path, "wb") as f:
+            f.write(self.encode())
+
+    @staticmethod
+    def load(path: str) -> "Replay":
+        with open(path, "rb") as f:
+            return Replay.decode(f.read())
+
+
+# writes a finished sprint into directory, returns its path
+def save_recording(replay: Replay, directory: str = RECORD_DIR) -> str:
+    os.makedirs(directory, exist_ok=True)
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    path = os.path.join(directory, f"sprint-{stamp}-{replay.seed:08x}.replay")
+    replay.save(path)
+    return path
+
+
+def write_varint(out: bytearray, value: int):
+    while value > 0x7F:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def read_varint(data: bytes, pos: int) -> tuple[int, int]:
+    value = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+# Collects the inputs a Simulation applies, relative to its start tick.
+# bot marks the recording as played by bot.py.
+class Recorder:
+    def __init__(self, bot: bool = False):
+        self.bot = bot
+        self.events: list[tuple[int, int, bool]] = []
+
+    def reset(self):
+        self.events.clear()
+
+    def record(self, at: int, action: int, down: bool):
+        self.events.append((at, action, down))
+
+    def replay(self, sim: Simulation) -> Replay:
+        finished_at = None
+        if sim.finished_at is not None:
+            finished_at = round(sim.finished_at / TICK_MS) - sim.start_tick
+        return Replay(
+            sim.game.seed,
+            tuple(self.events),
+            finished_at,
+            SPRINT_LINES - sim.game.lines_left,
+            self.bot,
+        )
+
+
+# Pushes a replay's events into a Simulation started at start (ms) as their
+# time comes, exactly like the main loop pushes key presses.
+class ReplayPlayer:
+    def __init__(self, replay: Replay, start: float):
+        self.events = deque(replay.events)
+        self.start = start
+
+    @property
+    def done(self) -> bool:
+        return not self.events
+
+    def next_time(self) -> Optional[float]:
+        if not self.events:
+            return None
+        return self.start + self.events[0][0] * TICK_MS
+
+    def feed(self, sim: Simulation, now: float):
+        events = self.events
+        while events and self.start + events[0][0] * TICK_MS <= now:
+            at, action, down = events.popleft()
+            sim.push(self.start + at * TICK_MS, action, down)
@@ -0,0 +1,119 @@
+import math
+from collections import deque
+from typing import Optional
+
+from actions import (
+    HARD_DROP,
+    HOLD,
+    MOVE_LEFT,
+    MOVE_RIGHT,
+    RESTART,
+    ROTATE_180,
+    ROTATE_CCW,
+    ROTATE_CW,
+    SOFT_DROP,
+)
+from game import Game
+from input_scheduler import LEFT, RIGHT, InputScheduler
+
+TICK_MS = 1  # 1 kHz
+
+
+# Steps the game in fixed 1 ms ticks, independent of how often it is drawn.
+# Inputs (actions codes) are queued with their timestamps and applied on the
+# tick they fall in, so the outcome only depends on the input timeline, never
+# on when run_until() happens to be called. Ticks where no input and no
+# scheduler deadline falls are skipped, as nothing can change in them.
+class Simulation:
+    def __init__(self, game: Game, now: float):
+        self.game = game
+        self.scheduler = InputScheduler(game)
+        self.inputs: deque[tuple[int, int, bool]] = deque()
+        self.applied = 0  # inputs applied so far
+        self.recorder = None  # a replay.Recorder, fed every applied input
+        self._start(self.tick_at(now))
+
+    def _start(self, tick: int):
+        self.start_tick = tick
+        self.tick = tick
+        self.scheduler.reset(tick * TICK_MS)
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        if self.recorder is not None:
+            self.recorder.reset()
+
+    # the tick a moment in time falls in
+    @staticmethod
+    def tick_at(time: float) -> int:
+        return math.floor(time / TICK_MS)
+
+    def push(self, time: float, action: int, down: bool):
+        self.inputs.append((self.tick_at(time), action, down))
+
+    def next_deadline(self) -> float:
+        if self.inputs:
+            return min(self.inputs[0][0] * TICK_MS, self.scheduler.next_deadline())
+        return self.scheduler.next_deadline()
+
+    def run_until(self, now: float):
+        target = self.tick_at(now)
+        while self.finished_at is None:
+            tick = math.ceil(self.scheduler.next_deadline() / TICK_MS)
+            if self.inputs:
+                tick = min(tick, self.inputs[0][0])
+            tick = max(tick, self.tick)
+            if tick > target:
+                break
+            self.step(tick)
+
+    def step(self, tick: int):
+        self.tick = tick
+        time = tick * TICK_MS
+        inputs = self.inputs
+        while inputs and inputs[0][0] <= tick:
+            _, action, down = inputs.popleft()
+            self.applied += 1
+            if self.recorder is not None:
+                self.recorder.record(tick - self.start_tick, action, down)
+            self.scheduler.advance(time)
+            if down:
+                self._action_down(action, time)
+            else:
+                self._action_up(action, time)
+        self.scheduler.advance(time)
+        if self.game.finished and self.finished_at is None:
+            self.finished_at = time
+
+    def _action_up(self, action: int, time: float):
+        if action == MOVE_LEFT:
+            self.scheduler.shift_up(LEFT, time)
+        if action == MOVE_RIGHT:
+            self.scheduler.shift_up(RIGHT, time)
+
+    def _action_down(self, action: int, time: float):
+        game = self.game
+        scheduler = self.scheduler
+        if action == RESTART:
+            game.reset()
+            self._start(self.tick)
+            return
+        if self.started_at is None:
+            self.started_at = time
+        if action == MOVE_LEFT:
+            scheduler.shift_down(LEFT, time)
+        if action == MOVE_RIGHT:
+            scheduler.shift_down(RIGHT, time)
+        if action == SOFT_DROP:
+            game.soft_drop()
+            scheduler.reset_gravity(time)
+        if action == ROTATE_CW:
+            game.active_tetramino.rotate_cw()
+        if action == ROTATE_CCW:
+            game.active_tetramino.rotate_ccw()
+        if action == ROTATE_180:
+            game.active_tetramino.rotate_180()
+        if action == HARD_DROP:
+            game.hard_drop()
+            scheduler.reset_gravity(time)
+        if action == HOLD and game.hold():
+            scheduler.reset_gravity(time)
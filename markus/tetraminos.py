@@ -1,4 +1,6 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+
+from piece_table import RotationTable, compile_shapes
 
 
 @dataclass
@@ -6,6 +8,10 @@ class Tetramino:
     color: tuple[int, int, int]
     shapes: list[list[str]]
     rotation_offsets: list[list[tuple[int, int]]]
+    table: tuple[RotationTable, ...] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self.table = compile_shapes(self.shapes)
 
 
 ROTATION_OFFSETS_DEFAULT = [
@@ -219,4 +225,4 @@ Z = Tetramino(
     ROTATION_OFFSETS_DEFAULT,
 )
 
-ALL_TETRAMINOS = [I, J, L, O, S, T, Z]
+ALL_TETRAMINOS = (I, J, L, O, S, T, Z)
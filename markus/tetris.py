@@ -1,194 +1,180 @@
-from dataclasses import dataclass
-from queue import Queue
+import sys
+from time import perf_counter_ns
 from typing import Optional
+
+import actions
 import pygame
-from active_tetramino import ActiveTetramino
-from grid import Grid
-from queue import QUEUE_PIECE_HEIGHT, VISIBLE_QUEUE_LENGTH
-from time import time
-
-from tetraminos import Tetramino
-
-pygame.font.init()
-FONT = pygame.font.Font(pygame.font.get_default_font(), 64)
-
-WINDOW_WIDTH = 800
-WINDOW_HEIGHT = 700
-S_WIDTH = 800
-S_HEIGHT = 700
-BLOCK_SIZE = 32
-PLAY_WIDTH = BLOCK_SIZE * Grid.WIDTH
-PLAY_HEIGHT = BLOCK_SIZE * Grid.HEIGHT
-
-top_left_x = (S_WIDTH - PLAY_WIDTH) // 2
-top_left_y = S_HEIGHT - PLAY_HEIGHT
-
-DAS = 80
-
-
-@dataclass
-class GameState:
-    grid: Grid
-    active_tetramino: ActiveTetramino
-    held_tetramino: Optional[Tetramino]
-    queue: Queue
-
-    fall_timer: int = 0
-    right_held: bool = False
-    right_das_timer: int = 0
-    left_held: bool = False
-    hold_available: bool = True
-    left_das_timer: int = 0
-
-    lines_left: int = 40
-    start_time: float = time()
-    started = False
-
-
-def draw(window: pygame.Surface, gs: GameState):
-    window.fill((0, 0, 0))
-
-    grid_surface = window.subsurface(
-        (
-            WINDOW_WIDTH // 2 - Grid.WIDTH * BLOCK_SIZE // 2,
-            WINDOW_HEIGHT - PLAY_HEIGHT,
-            BLOCK_SIZE * Grid.WIDTH,
-            BLOCK_SIZE * Grid.HEIGHT,
-        ),
-    )
-    queue_surface = window.subsurface(
-        (
-            WINDOW_WIDTH - 6 * BLOCK_SIZE,
-            WINDOW_HEIGHT - PLAY_HEIGHT,
-            BLOCK_SIZE * 4,
-            BLOCK_SIZE * QUEUE_PIECE_HEIGHT * VISIBLE_QUEUE_LENGTH,
-        ),
-    )
-    hold_piece_surface = window.subsurface(
-        (
-            BLOCK_SIZE * 2,
-            WINDOW_HEIGHT - PLAY_HEIGHT + BLOCK_SIZE,
-            BLOCK_SIZE * 10,
-            BLOCK_SIZE * 15,
-        ),
-    )
-
-    gs.grid.draw(grid_surface, BLOCK_SIZE)
-    gs.active_tetramino.draw_ghost(grid_surface, BLOCK_SIZE)
-    gs.active_tetramino.draw(grid_surface, BLOCK_SIZE)
-    gs.queue.draw(queue_surface, BLOCK_SIZE)
-    gs.grid.draw_gridlines(grid_surface, BLOCK_SIZE)
-    if gs.held_tetramino is not None:
-        ActiveTetramino(gs.held_tetramino, 1, 3).draw(hold_piece_surface, BLOCK_SIZE)
-
-    text_surface = FONT.render(str(gs.lines_left), False, (255, 255, 255))
-    window.blit(
-        text_surface,
-        (
-            BLOCK_SIZE * 2,
-            WINDOW_HEIGHT - BLOCK_SIZE * 4,
-        ),
-    )
-
-    pygame.display.update()
-
-
-def main(window: pygame.Surface):
-    queue = Queue()
-    active_tetramino = ActiveTetramino(queue.pop())
-
-    gs = GameState(Grid.get(), active_tetramino, None, queue)
-
-    lock_piece = False
+from bot import BOT_PPS, SLICE_MS, Bot
+from clock import Clock, RealClock
+from game import Game
+from latency import LATENCY_MODE, LatencyMonitor
+from profiler import phase, write_profile
+from render import S_HEIGHT, S_WIDTH, Renderer
+from replay import RECORD_DIR, Recorder, Replay, ReplayPlayer, save_recording
+from simulation import TICK_MS, Simulation
+from timer_queue import TimerQueue
+
+FRAME_MS = 1000 / 60  # how often the running timer is redrawn
+
+KEY_ACTIONS = {
+    pygame.K_LEFT: actions.MOVE_LEFT,
+    pygame.K_RIGHT: actions.MOVE_RIGHT,
+    pygame.K_DOWN: actions.SOFT_DROP,
+    pygame.K_UP: actions.ROTATE_CW,
+    pygame.K_x: actions.ROTATE_CCW,
+    pygame.K_z: actions.ROTATE_180,
+    pygame.K_c: actions.HARD_DROP,
+    pygame.K_LSHIFT: actions.HOLD,
+    pygame.K_v: actions.RESTART,
+}
+
+WAIT_PHASE = phase("wait")
+EVENTS_PHASE = phase("event_pump")
+SIMULATION_PHASE = phase("simulation")
+SNAPSHOT_PHASE = phase("snapshot")
+PAINT_PHASE = phase("paint")
+
+
+# Blocks until an event arrives or the earliest timer is due. pygame only
+# sleeps in whole milliseconds, so the last fraction of one is polled.
+def wait_events(
+    timers: TimerQueue, clock: Clock, now: float
+) -> list[pygame.event.Event]:
+    timeout = timers.timeout(now)
+    if timeout is not None:
+        timeout = clock.real_ms(timeout)
+    with WAIT_PHASE:
+        if timeout is None:
+            events = [pygame.event.wait()]
+        elif timeout >= 1:
+            events = [pygame.event.wait(int(timeout))]
+        else:
+            events = []
+    with EVENTS_PHASE:
+        events += pygame.event.get()
+    return [event for event in events if event.type != pygame.NOEVENT]
+
+
+# Plays a sprint from the keyboard, or watches replay when one is given, or
+# lets the bot play at up to bot_pps pieces a second.
+def main(
+    window: pygame.Surface,
+    latency_mode: str = LATENCY_MODE,
+    replay: Optional[Replay] = None,
+    clock: Optional[Clock] = None,
+    bot_pps: float = BOT_PPS,
+):
+    clock = clock if clock is not None else RealClock()
+    bot_pps = bot_pps if replay is None else 0
+    if replay is None:
+        sim = Simulation(Game(), clock.now())
+        recorder = sim.recorder = Recorder(bot=bool(bot_pps))
+        player = None
+    else:
+        sim = Simulation(Game(seed=replay.seed), clock.now())
+        recorder = None
+        player = ReplayPlayer(replay, sim.start_tick * TICK_MS)
+    bot = Bot(sim, bot_pps) if bot_pps else None
+
+    renderer = Renderer()
+    timers = TimerQueue()
+    latency = None
+    # the monitor pairs applied inputs with keyboard reads, bot taps would
+    # throw the pairing off
+    if latency_mode and bot is None:
+        latency = LatencyMonitor(overlay=latency_mode == "overlay")
+
     run = True
-    clock = pygame.time.Clock()
+    painted = None  # (tick, inputs applied) of the last painted frame
+    redraw_at = None
 
     while run:
-        gs.fall_timer += clock.get_rawtime()
-        if gs.left_held:
-            gs.left_das_timer += clock.get_rawtime()
-        if gs.right_held:
-            gs.right_das_timer += clock.get_rawtime()
         clock.tick()
-
-        if gs.fall_timer / 1000 > 1:
-            gs.fall_timer = 0
-            valid = gs.active_tetramino.move_down()
-            if not valid:
-                lock_piece = True
-
-        for event in pygame.event.get():
+        timers.set("input", sim.next_deadline())
+        if player is not None and not player.done:
+            timers.set("replay", player.next_time())
+        else:
+            timers.cancel("replay")
+        if bot is not None:
+            timers.set("bot", bot.next_deadline(clock.now()))
+        events = wait_events(timers, clock, clock.now())
+        now = clock.now()
+        read_ns = perf_counter_ns()
+        for event in events:
             if event.type == pygame.QUIT:
                 run = False
                 pygame.display.quit()
 
-            if event.type == pygame.KEYUP:
-                if event.key == pygame.K_LEFT:
-                    gs.left_held = False
-                    gs.left_das_timer = 0
-                if event.key == pygame.K_RIGHT:
-                    gs.right_held = False
-                    gs.right_das_timer = 0
-
-            if event.type == pygame.KEYDOWN:
-                if not gs.started:
-                    gs.started = True
-                    gs.start_time = time()
-                if event.key == pygame.K_v:
-                    gs.grid.reset()
-                    main(window)
-                if event.key == pygame.K_LEFT:
-                    gs.active_tetramino.move_left()
-                    gs.left_held = True
-                if event.key == pygame.K_RIGHT:
-                    gs.right_held = True
-                    gs.active_tetramino.move_right()
-                if event.key == pygame.K_DOWN:
-                    while gs.active_tetramino.move_down():
-                        pass
-                    gs.fall_timer = 0
-                if event.key == pygame.K_UP:
-                    gs.active_tetramino.rotate_cw()
-                if event.key == pygame.K_x:
-                    gs.active_tetramino.rotate_ccw()
-                if event.key == pygame.K_z:
-                    gs.active_tetramino.rotate_180()
-                if event.key == pygame.K_c:
-                    while gs.active_tetramino.move_down():
-                        pass
-                    lock_piece = True
-                if event.key == pygame.K_LSHIFT and gs.hold_available:
-                    held_tetramino = gs.held_tetramino
-                    gs.held_tetramino = gs.active_tetramino.base_tetramino
-                    if held_tetramino is None:
-                        gs.active_tetramino = ActiveTetramino(queue.pop())
-                    else:
-                        gs.active_tetramino = ActiveTetramino(held_tetramino)
-                    gs.fall_timer = 0
-                    gs.hold_available = False
-
-        if gs.left_das_timer > DAS:
-            while gs.active_tetramino.move_left():
-                pass
-        if gs.right_das_timer > DAS:
-            while gs.active_tetramino.move_right():
-                pass
-
-        if lock_piece:
-            gs.grid.insert_piece(gs.active_tetramino)
-            lines_cleared = gs.grid.clear_rows()
-            gs.lines_left -= lines_cleared
-            gs.fall_timer = 0
-            gs.active_tetramino = ActiveTetramino(queue.pop())
-            lock_piece = False
-            gs.hold_available = True
-
-        if gs.lines_left < 1:
-            print(time() - gs.start_time)
+            if player is None and event.type in (pygame.KEYDOWN, pygame.KEYUP):
+                down = event.type == pygame.KEYDOWN
+                action = KEY_ACTIONS.get(event.key, actions.OTHER)
+                # pygame 2 does not expose SDL's event timestamps, so a key
+                # counts from when it is read
+                sim.push(now, action, down)
+                if latency is not None:
+                    latency.read(event.key, down, read_ns)
+        if not run:
             break
-        draw(window, gs)
-
 
-window = pygame.display.set_mode((S_WIDTH, S_HEIGHT))
-pygame.display.set_caption("Tetris")
-main(window)
+        if player is not None:
+            player.feed(sim, now)
+        applied = sim.applied
+        with SIMULATION_PHASE:
+            sim.run_until(now)
+        if latency is not None:
+            latency.applied(sim.applied - applied, perf_counter_ns())
+
+        if sim.finished_at is not None:
+            print((sim.finished_at - sim.started_at) / 1000)
+            if recorder is not None and RECORD_DIR:
+                print(save_recording(recorder.replay(sim)))
+            break
+        if sim.started_at is not None:
+            elapsed_ms = int(now - sim.started_at)
+            redraw = redraw_at is None or now >= redraw_at
+            # on a fixed cadence from the start, so the work done in an
+            # iteration never pushes the next redraw back
+            frames = (now - sim.started_at) // FRAME_MS + 1
+            redraw_at = sim.started_at + frames * FRAME_MS
+            timers.set("display", redraw_at)
+        else:
+            elapsed_ms = 0
+            redraw = False
+            redraw_at = None
+            timers.cancel("display")
+        if bot is not None:
+            # the budget is wall-clock time; only a real clock waits for the
+            # next redraw, so only then think up to it and not while one is due
+            budget = SLICE_MS
+            if isinstance(clock, RealClock) and redraw_at is not None:
+                budget = 0.0 if redraw else min(budget, redraw_at - now)
+            bot.update(now, budget)
+        # nothing but the timer changes between ticks
+        if (sim.tick, sim.applied) == painted and not redraw:
+            continue
+        painted = (sim.tick, sim.applied)
+        with SNAPSHOT_PHASE:
+            snapshot = sim.game.snapshot()
+        with PAINT_PHASE:
+            dirty = renderer.paint(window, snapshot, elapsed_ms)
+        if latency is not None:
+            latency.drawn(perf_counter_ns())
+            if dirty is None:
+                latency.invalidate_overlay()
+            overlay = latency.draw_overlay(window)
+            if dirty is not None:
+                dirty += overlay
+        renderer.present(dirty)
+        if latency is not None:
+            latency.presented(perf_counter_ns())
+
+    if latency is not None:
+        latency.dump()
+    write_profile()
+
+
+if __name__ == "__main__":
+    window = pygame.display.set_mode((S_WIDTH, S_HEIGHT))
+    pygame.display.set_caption("Tetris")
+    # python tetris.py [file.replay]
+    main(window, replay=Replay.load(sys.argv[1]) if len(sys.argv) > 1 else None)
@@ -0,0 +1,25 @@
+from typing import Optional
+
+
+# The few named deadlines (ms) the main loop waits on: the next input
+# scheduler action and the next timer display tick. With this many entries a
+# dict and min() beat a heap, and re-arming a deadline is a plain assignment.
+class TimerQueue:
+    def __init__(self):
+        self._deadlines: dict[str, float] = {}
+
+    def set(self, name: str, at: float):
+        self._deadlines[name] = at
+
+    def cancel(self, name: str):
+        self._deadlines.pop(name, None)
+
+    def next_deadline(self) -> Optional[float]:
+        return min(self._deadlines.values(), default=None)
+
+    # ms to block for, None to wait for the next event
+    def timeout(self, now: float) -> Optional[float]:
+        deadline = self.next_deadline()
+        if deadline is None:
+            return None
+        return max(0.0, deadline - now)
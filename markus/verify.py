@@ -0,0 +1,83 @@
+import sys
+from dataclasses import dataclass
+from typing import Optional
+
+from clock import FixedStepClock
+from game import SPRINT_LINES, Game
+from grid import Grid
+from replay import Replay, ReplayPlayer
+from simulation import TICK_MS, Simulation
+
+
+@dataclass(frozen=True)
+class Verdict:
+    lines_cleared: int
+    finished_at: Optional[int]
+    final_time: Optional[int]
+    expected: Replay
+
+    @property
+    def ok(self) -> bool:
+        return (
+            self.lines_cleared == self.expected.lines_cleared
+            and self.finished_at == self.expected.finished_at
+        )
+
+    # a bot run replays fine but is no valid submission
+    @property
+    def valid(self) -> bool:
+        return self.ok and not self.expected.bot
+
+
+# Re-simulates a replay on a virtual clock: time jumps straight from one
+# recorded event to the next, so nothing waits on the wall clock and a
+# 40-line sprint takes milliseconds.
+def verify(replay: Replay, grid: Optional[Grid] = None) -> Verdict:
+    clock = FixedStepClock()
+    sim = Simulation(Game(grid, replay.seed), clock.now())
+    player = ReplayPlayer(replay, clock.now())
+    while not player.done and sim.finished_at is None:
+        clock.advance_to(player.next_time())
+        player.feed(sim, clock.now())
+        sim.run_until(clock.now())
+    # a sprint can also end on a gravity lock after the last input
+    if sim.finished_at is None and replay.finished_at is not None:
+        clock.advance_to(replay.finished_at * TICK_MS)
+        sim.run_until(clock.now())
+
+    finished_at = None
+    final_time = None
+    if sim.finished_at is not None:
+        finished_at = round(sim.finished_at / TICK_MS)
+        final_time = round((sim.finished_at - sim.started_at) / TICK_MS)
+    return Verdict(SPRINT_LINES - sim.game.lines_left, finished_at, final_time, replay)
+
+
+# python verify.py sprint.replay ... exits non-zero if any replay does not
+# load, mismatches or was played by the bot
+def main(paths: list[str]) -> int:
+    failed = 0
+    for path in paths:
+        # a file that does not load fails on its own, the rest still run
+        try:
+            replay = Replay.load(path)
+        except (ValueError, OSError) as error:
+            print(f"{path}: INVALID {error}")
+            failed += 1
+            continue
+        verdict = verify(replay)
+        status = "ok" if verdict.ok else "MISMATCH"
+        if verdict.expected.bot:
+            status += " BOT"
+        expected = verdict.expected
+        print(
+            f"{path}: {status} lines={verdict.lines_cleared}"
+            f" (claimed {expected.lines_cleared})"
+            f" time={verdict.final_time}ms (claimed {expected.final_time}ms)"
+        )
+        failed += not verdict.valid
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))